@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class CameraConfig:
+    azimuth: float = 45.0  # Degrees around the vertical (Y) axis
+    elevation: float = 30.0  # Degrees above the ground plane
+    fov: float = 60.0  # Vertical field of view in degrees
+    zoom: float = 1.0  # Values above 1 move the camera closer to the target
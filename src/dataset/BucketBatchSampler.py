@@ -0,0 +1,85 @@
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import torch
+from torch.utils.data import Sampler
+
+from src.dataset.BuildingVoxelDataset import BuildingVoxelDataset
+
+
+class BucketBatchSampler(Sampler[List[int]]):
+    """Batch sampler that never mixes samples from different size buckets.
+
+    Samples are grouped by the ``bucket`` recorded for their shard (or by the
+    shard's padded shape for datasets written without buckets). Each epoch the
+    indices are shuffled within every bucket, cut into batches, and the batches
+    of all buckets are shuffled together, so a batch of small houses is not
+    padded up to the size of the tallest church.
+    """
+
+    def __init__(
+        self,
+        dataset: BuildingVoxelDataset,
+        batch_size: int,
+        shuffle: bool = True,
+        drop_last: bool = False,
+        seed: int = 0,
+    ):
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.seed = seed
+        self.epoch = 0
+
+        groups: Dict[object, List[np.ndarray]] = defaultdict(list)
+        for shard_index, shard in enumerate(dataset.shards):
+            key = shard.get("bucket") or tuple(shard.get("shape", ()))
+            start, stop = dataset.offsets[shard_index : shard_index + 2]
+            groups[key].append(np.arange(start, stop))
+        self.buckets = {key: np.concatenate(parts) for key, parts in groups.items()}
+
+    def set_epoch(self, epoch: int):
+        """Change the shuffle order, e.g. once per training epoch"""
+        self.epoch = epoch
+
+    def _batches(self) -> List[np.ndarray]:
+        rng = np.random.default_rng((self.seed, self.epoch))
+        batches = []
+        for indices in self.buckets.values():
+            if self.shuffle:
+                indices = rng.permutation(indices)
+            for start in range(0, len(indices), self.batch_size):
+                batch = indices[start : start + self.batch_size]
+                if len(batch) < self.batch_size and self.drop_last:
+                    continue
+                batches.append(batch)
+        if self.shuffle:
+            batches = [batches[i] for i in rng.permutation(len(batches))]
+        return batches
+
+    def __iter__(self) -> Iterator[List[int]]:
+        for batch in self._batches():
+            yield batch.tolist()
+
+    def __len__(self) -> int:
+        if self.drop_last:
+            return sum(len(i) // self.batch_size for i in self.buckets.values())
+        return sum(-(-len(i) // self.batch_size) for i in self.buckets.values())
+
+
+def pad_collate(
+    batch: List[Dict], multiple: int = 8, dtype=np.int64
+) -> Dict[str, torch.Tensor]:
+    """Pad a batch of voxel grids to its own largest extents
+
+    Extents are rounded up to ``multiple`` so the grids still fit the UNet's
+    down-sampling steps. Returns class indices of shape (B, X, Y, Z).
+    """
+    shapes = np.array([sample["voxels"].shape for sample in batch])
+    target = -(-shapes.max(axis=0) // multiple) * multiple
+    voxels = np.zeros((len(batch), *target), dtype=dtype)
+    for i, sample in enumerate(batch):
+        x, y, z = sample["voxels"].shape
+        voxels[i, :x, :y, :z] = sample["voxels"]
+    return {"voxels": torch.from_numpy(voxels)}
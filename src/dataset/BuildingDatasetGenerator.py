@@ -1,7 +1,12 @@
+import argparse
 import json
-from enum import Enum
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from enum import Enum
+from itertools import repeat
 from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import numpy as np
 
@@ -13,11 +18,18 @@ from src.classes.BuildingConfig import (
     Orientation,
     RoofStyle,
 )
+from src.dataset.ShardWriter import ShardWriter
 from src.dataset.utils import ComplexEncoder
 from src.renderer.objects.Building import Building
+from src.renderer.objects.BuildingBatch import BuildingBatch
+from src.renderer.objects.BuildingCache import BUILDING_CACHE
 from src.renderer.objects.Church import Church
 from src.renderer.objects.Shop import Shop
 from src.renderer.objects.Tower import Tower
+from src.utils.seeding import spawn_rng
+
+# Edge lengths of the size buckets generate_dataset pads buildings to
+DEFAULT_BUCKET_SIZES = (16, 32, 48, 64)
 
 
 class BuildingStyle(Enum):
@@ -28,77 +40,192 @@ class BuildingStyle(Enum):
 
 
 class BuildingDatasetGenerator:
-    def __init__(self, output_path: str = "building_dataset"):
+    def __init__(self, output_path: str = "building_dataset", seed: int = 0):
         self.output_path = Path(output_path)
         self.output_path.mkdir(parents=True, exist_ok=True)
+        self.seed = seed
 
-    def generate_dataset(self, buildings_per_style: int = 250):
-        dataset = []
-
-        for style in BuildingStyle:
-            print(f"Generating {style.value} buildings...")
-            for i in range(buildings_per_style):
-                # Generate building
-                config = self._generate_config(style)
-                building = self._create_building(config)
-
-                # Store data
-                building_data = {
-                    "voxels": building.voxels.tolist(),
-                    "style": style.value,
-                    "prompt": self._generate_prompt(style, config),
-                    "config": config.__dict__,
-                }
-                dataset.append(building_data)
+    def iter_buildings(
+        self,
+        buildings_per_style: int = 250,
+        styles: Optional[List[BuildingStyle]] = None,
+        workers: int = 1,
+        chunksize: int = 64,
+    ) -> Iterator[Tuple[np.ndarray, Dict[str, Any]]]:
+        """Lazily generate buildings as (voxels, metadata) pairs
 
-        # Find maximum dimensions
-        max_x = max(len(d["voxels"]) for d in dataset)
-        max_y = max(len(d["voxels"][0]) if len(d["voxels"]) > 0 else 0 for d in dataset)
-        max_z = max(
-            (
-                len(d["voxels"][0][0])
-                if len(d["voxels"]) > 0 and len(d["voxels"][0]) > 0
-                else 0
+        Buildings are generated in batches of ``chunksize``. With workers > 1
+        the batches run in a process pool. Every building draws from its own
+        random stream and results are yielded in index order, so the output
+        does not depend on the number of workers or the batch size.
+        """
+        styles = styles or list(BuildingStyle)
+        executor = ProcessPoolExecutor(workers) if workers > 1 else None
+        # Bound the number of in-flight batches so results never pile up in memory
+        window = workers * 4
+        try:
+            for style in styles:
+                print(f"Generating {style.value} buildings...")
+                batches = [
+                    range(start, min(start + chunksize, buildings_per_style))
+                    for start in range(0, buildings_per_style, chunksize)
+                ]
+                if executor is None:
+                    for indices in batches:
+                        yield from self._generate_batch(style, indices)
+                    continue
+                for start in range(0, len(batches), window):
+                    window_batches = batches[start : start + window]
+                    for samples in executor.map(
+                        self._generate_batch,
+                        repeat(style, len(window_batches)),
+                        window_batches,
+                    ):
+                        yield from samples
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+
+    def _generate_batch(
+        self, style: BuildingStyle, indices: Sequence[int]
+    ) -> List[Tuple[np.ndarray, Dict[str, Any]]]:
+        """Generate the buildings of a style with the given indices
+
+        Residential buildings are plain ``BuildingConfig``s and are generated
+        together by ``BuildingBatch``; the other styles add parts the batch
+        kernel does not cover and are built one by one.
+        """
+        if style != BuildingStyle.RESIDENTIAL:
+            return [self._generate_sample(style, index) for index in indices]
+
+        style_index = list(BuildingStyle).index(style)
+        configs = [
+            self._generate_config(style, self._rng(style_index, index))
+            for index in indices
+        ]
+        return [
+            (voxels, self._generate_metadata(style, config))
+            for config, voxels in zip(configs, BuildingBatch(configs).iter_voxels())
+        ]
+
+    def _generate_sample(
+        self, style: BuildingStyle, index: int
+    ) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Generate the index-th building of a style from its own random stream"""
+        style_index = list(BuildingStyle).index(style)
+        config = self._generate_config(style, self._rng(style_index, index))
+        building = self._create_building(config)
+        return building.voxels, self._generate_metadata(style, config)
+
+    def _generate_metadata(
+        self, style: BuildingStyle, config: BuildingConfig
+    ) -> Dict[str, Any]:
+        return {
+            "style": style.value,
+            "prompt": self._generate_prompt(style, config),
+            "config": config.__dict__,
+        }
+
+    def generate_dataset(
+        self,
+        buildings_per_style: int = 250,
+        styles: Optional[List[BuildingStyle]] = None,
+        workers: int = 1,
+        bucket_sizes: Optional[Sequence[int]] = DEFAULT_BUCKET_SIZES,
+    ):
+        """Generate the whole dataset at once
+
+        By default buildings are padded to the smallest of ``bucket_sizes``
+        that fits them instead of to the largest building. Every bucket is
+        written as one shard of the sharded layout (``manifest.json`` plus one
+        voxel and metadata file per bucket), which ``BuildingVoxelDataset``
+        reads like any sharded dataset. Pass ``bucket_sizes=None`` for the
+        single-file layout, one ``voxels.npy`` padded to the largest building.
+        """
+        if bucket_sizes:
+            # One shard per size bucket instead of padding to the global maximum
+            num_styles = len(styles or BuildingStyle)
+            self.generate_sharded_dataset(
+                buildings_per_style,
+                shard_size=buildings_per_style * num_styles,
+                styles=styles,
+                workers=workers,
+                bucket_sizes=bucket_sizes,
             )
-            for d in dataset
-        )
+            return
+
+        voxels_list = []
+        metadata = []
+        for voxels, building_metadata in self.iter_buildings(
+            buildings_per_style, styles=styles, workers=workers
+        ):
+            voxels_list.append(voxels)
+            metadata.append(building_metadata)
+
+        # Find maximum dimensions
+        max_x, max_y, max_z = np.max([v.shape for v in voxels_list], axis=0)
 
         print(f"Maximum dimensions: {max_x}x{max_y}x{max_z}")
 
         # Pad all voxels to the same size
-        padded_voxels = []
-        for d in dataset:
-            voxels = np.array(d["voxels"])
-            padded = np.zeros((max_x, max_y, max_z), dtype=voxels.dtype)
-            padded[: voxels.shape[0], : voxels.shape[1], : voxels.shape[2]] = voxels
-            padded_voxels.append(padded)
+        voxels_array = np.zeros((len(voxels_list), max_x, max_y, max_z), dtype=np.int8)
+        for i, voxels in enumerate(voxels_list):
+            voxels_array[i, : voxels.shape[0], : voxels.shape[1], : voxels.shape[2]] = (
+                voxels
+            )
 
         # Save dataset
         print("Saving dataset...")
-        voxels_array = np.array(padded_voxels)
         np.save(self.output_path / "voxels.npy", voxels_array)
         print(f"Dataset voxels shape: {voxels_array.shape}")
 
         # Save metadata
-        metadata = [
-            {"style": d["style"], "prompt": d["prompt"], "config": d["config"]}
-            for d in dataset
-        ]
-
         with open(self.output_path / "metadata.json", "w") as f:
             json.dump(metadata, f, indent=2, cls=ComplexEncoder)
 
-    def _generate_config(self, style: BuildingStyle) -> BuildingConfig:
+    def generate_sharded_dataset(
+        self,
+        buildings_per_style: int = 250,
+        shard_size: int = 4096,
+        styles: Optional[List[BuildingStyle]] = None,
+        workers: int = 1,
+        encoding: str = "dense",
+        bucket_sizes: Optional[List[int]] = None,
+    ):
+        """Generate the dataset as a stream of fixed-size shards plus a manifest
+
+        Only the samples of the shard currently being filled are held in
+        memory, and finished shards are usable while generation continues.
+        """
+        with ShardWriter(
+            self.output_path,
+            shard_size=shard_size,
+            encoding=encoding,
+            bucket_sizes=bucket_sizes,
+        ) as writer:
+            for voxels, metadata in self.iter_buildings(
+                buildings_per_style, styles=styles, workers=workers
+            ):
+                writer.add(voxels, metadata)
+        print(f"Wrote {writer.num_samples} samples in {len(writer.shards)} shards")
+
+    def _rng(self, style_index: int, index: int) -> np.random.Generator:
+        """Random generator of the index-th building of a style"""
+        return spawn_rng(self.seed, style_index, index)
+
+    def _generate_config(
+        self, style: BuildingStyle, rng: np.random.Generator
+    ) -> BuildingConfig:
         pos = (0, 0, 0)
-        orientation = np.random.choice(list(Orientation))
+        orientation = rng.choice(list(Orientation))
 
         if style == BuildingStyle.TOWER:
             return TowerConfig(
-                width=np.random.randint(5, 8),
-                length=np.random.randint(5, 8),
-                height=np.random.randint(12, 20),
-                num_floors=np.random.randint(3, 5),
-                has_battlements=np.random.choice([True, False]),
+                width=rng.integers(5, 8),
+                length=rng.integers(5, 8),
+                height=rng.integers(12, 20),
+                num_floors=rng.integers(3, 5),
+                has_battlements=rng.choice([True, False]),
                 position=pos,
                 orientation=orientation,
                 roof_style=RoofStyle.PYRAMID,
@@ -106,11 +233,11 @@ class BuildingDatasetGenerator:
 
         elif style == BuildingStyle.CHURCH:
             return ChurchConfig(
-                width=np.random.randint(8, 15),
-                length=np.random.randint(12, 20),
-                height=np.random.randint(8, 12),
+                width=rng.integers(8, 15),
+                length=rng.integers(12, 20),
+                height=rng.integers(8, 12),
                 has_steeple=True,
-                steeple_height=np.random.randint(6, 10),
+                steeple_height=rng.integers(6, 10),
                 position=pos,
                 orientation=orientation,
                 roof_style=RoofStyle.PITCHED,
@@ -118,33 +245,35 @@ class BuildingDatasetGenerator:
 
         elif style == BuildingStyle.SHOP:
             return ShopConfig(
-                width=np.random.randint(6, 10),
-                length=np.random.randint(8, 12),
-                height=np.random.randint(4, 7),
+                width=rng.integers(6, 10),
+                length=rng.integers(8, 12),
+                height=rng.integers(4, 7),
                 has_display_window=True,
-                shop_type=np.random.choice(
-                    ["bakery", "blacksmith", "tailor", "general"]
-                ),
+                shop_type=rng.choice(["bakery", "blacksmith", "tailor", "general"]),
                 position=pos,
                 orientation=orientation,
-                roof_style=np.random.choice([RoofStyle.FLAT, RoofStyle.PITCHED]),
+                roof_style=rng.choice([RoofStyle.FLAT, RoofStyle.PITCHED]),
             )
 
         else:  # RESIDENTIAL
             return BuildingConfig(
-                width=np.random.randint(4, 12),
-                length=np.random.randint(4, 15),
-                height=np.random.randint(4, 10),
-                roof_height=np.random.randint(2, 4),
-                door_height=np.random.randint(3, 4),
-                window_height=np.random.randint(2, 3),
-                window_size=np.random.randint(1, 4),
+                width=rng.integers(4, 12),
+                length=rng.integers(4, 15),
+                height=rng.integers(4, 10),
+                roof_height=rng.integers(2, 4),
+                door_height=rng.integers(3, 4),
+                window_height=rng.integers(2, 3),
+                window_size=rng.integers(1, 4),
                 position=pos,
                 orientation=orientation,
-                roof_style=np.random.choice(list(RoofStyle)),
+                roof_style=rng.choice(list(RoofStyle)),
             )
 
     def _create_building(self, config: BuildingConfig) -> Building:
+        return BUILDING_CACHE.get(config, self._construct_building)
+
+    @staticmethod
+    def _construct_building(config: BuildingConfig) -> Building:
         if isinstance(config, TowerConfig):
             return Tower(config)
         elif isinstance(config, ChurchConfig):
@@ -185,13 +314,92 @@ class BuildingDatasetGenerator:
         return f"{base} - {', '.join(features)}"
 
 
-if __name__ == "__main__":
-    dataset_path = Path("training_data")
-    current_date_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-    buildings_per_style = 250
-    dataset_path = (
-        dataset_path / f"n{buildings_per_style}_training_data_{current_date_str}"
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a voxel building dataset")
+    parser.add_argument(
+        "--per-style",
+        type=int,
+        default=250,
+        help="Number of buildings generated per style",
+    )
+    parser.add_argument(
+        "--styles",
+        nargs="+",
+        choices=[style.value for style in BuildingStyle],
+        default=[style.value for style in BuildingStyle],
+        help="Building styles to generate",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of generator processes",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Root random seed")
+    parser.add_argument(
+        "--format",
+        choices=["single", "sharded"],
+        default="single",
+        help="Write everything at once or stream fixed-size shards. With size "
+        "buckets both use the sharded layout with a manifest; 'single' then "
+        "writes one shard per bucket",
+    )
+    parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=4096,
+        help="Samples per shard for the sharded format",
     )
+    parser.add_argument(
+        "--encoding",
+        choices=["dense", "rle"],
+        default="dense",
+        help="Voxel encoding of shards: padded int8 or run-length/4-bit packed",
+    )
+    parser.add_argument(
+        "--buckets",
+        type=int,
+        nargs="*",
+        default=DEFAULT_BUCKET_SIZES,
+        help="Size bucket edge lengths buildings are padded to (default: "
+        f"{' '.join(map(str, DEFAULT_BUCKET_SIZES))}). Pass --buckets without "
+        "sizes to pad everything to the largest building, which with "
+        "--format single writes one voxels.npy",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Output directory (defaults to a dated folder in training_data)",
+    )
+    return parser.parse_args()
 
-    generator = BuildingDatasetGenerator(dataset_path)
-    generator.generate_dataset(buildings_per_style=buildings_per_style)
+
+if __name__ == "__main__":
+    args = parse_args()
+    dataset_path = args.output
+    if dataset_path is None:
+        current_date_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+        dataset_path = (
+            Path("training_data")
+            / f"n{args.per_style}_training_data_{current_date_str}"
+        )
+
+    generator = BuildingDatasetGenerator(dataset_path, seed=args.seed)
+    styles = [BuildingStyle(style) for style in args.styles]
+    if args.format == "sharded":
+        generator.generate_sharded_dataset(
+            buildings_per_style=args.per_style,
+            shard_size=args.shard_size,
+            styles=styles,
+            workers=args.workers,
+            encoding=args.encoding,
+            bucket_sizes=args.buckets,
+        )
+    else:
+        generator.generate_dataset(
+            buildings_per_style=args.per_style,
+            styles=styles,
+            workers=args.workers,
+            bucket_sizes=args.buckets,
+        )
@@ -0,0 +1,117 @@
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from torch.utils.data import Dataset
+
+from src.dataset.ShardWriter import MANIFEST_NAME
+from src.utils.encoding import decode_sample
+
+
+class BuildingVoxelDataset(Dataset):
+    """Memory-mapped dataset over the output of ``BuildingDatasetGenerator``.
+
+    Reads either the single-file layout (``voxels.npy`` + ``metadata.json``) or
+    the sharded layout described by ``manifest.json``. Voxel files are opened
+    with ``np.load(mmap_mode="r")`` and samples are returned as read-only views,
+    so nothing is copied until a transform touches the data and the page cache
+    is shared between ``DataLoader`` workers.
+
+    Sharded samples are cropped to their true size; pass a padding transform
+    when batching samples from different shards. Run-length encoded shards are
+    kept in memory in their compact form and decoded per sample.
+    """
+
+    def __init__(self, dataset_path, transform: Optional[Callable] = None):
+        self.dataset_path = Path(dataset_path)
+        self.transform = transform
+        self.sharded = (self.dataset_path / MANIFEST_NAME).exists()
+        self._arrays: Dict[str, Any] = {}
+        self._metadata_cache: Dict[int, List[Dict[str, Any]]] = {}
+        self.refresh()
+
+    def refresh(self):
+        """Re-read the manifest to pick up shards written since opening"""
+        if self.sharded:
+            with open(self.dataset_path / MANIFEST_NAME, "r") as f:
+                manifest = json.load(f)
+            self.complete = manifest["complete"]
+            self.shards: List[Dict[str, Any]] = manifest["shards"]
+        else:
+            self.complete = True
+            self.shards = [
+                {
+                    "voxels": "voxels.npy",
+                    "metadata": "metadata.json",
+                    "num_samples": len(self._open("voxels.npy")),
+                }
+            ]
+        counts = [shard["num_samples"] for shard in self.shards]
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+    @property
+    def voxels(self) -> np.ndarray:
+        """Memory-mapped voxel array of the single-file layout"""
+        if self.sharded:
+            raise AttributeError("Sharded datasets have one voxel array per shard")
+        return self._open("voxels.npy")
+
+    def _open(self, file_name: str) -> np.ndarray:
+        # Opened lazily so every DataLoader worker maps the file itself
+        if file_name not in self._arrays:
+            self._arrays[file_name] = np.load(
+                self.dataset_path / file_name, mmap_mode="r"
+            )
+        return self._arrays[file_name]
+
+    def _open_encoded(self, file_name: str) -> Dict[str, np.ndarray]:
+        if file_name not in self._arrays:
+            with np.load(self.dataset_path / file_name) as encoded:
+                self._arrays[file_name] = {key: encoded[key] for key in encoded.files}
+        return self._arrays[file_name]
+
+    def __getstate__(self):
+        # Pickling a memmap would copy its contents into every worker
+        state = self.__dict__.copy()
+        state["_arrays"] = {}
+        state["_metadata_cache"] = {}
+        return state
+
+    def _locate(self, idx: int):
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f"Index {idx} out of range for {len(self)} samples")
+        shard_index = int(np.searchsorted(self.offsets, idx, side="right")) - 1
+        return shard_index, idx - int(self.offsets[shard_index])
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __getitem__(self, idx):
+        shard_index, local_idx = self._locate(idx)
+        shard = self.shards[shard_index]
+        if shard.get("encoding") == "rle":
+            voxel_data = decode_sample(self._open_encoded(shard["voxels"]), local_idx)
+        elif self.sharded:
+            voxel_data = self._open(shard["voxels"])[local_idx]
+            shape = self._open(shard["shapes"])[local_idx]
+            voxel_data = voxel_data[: shape[0], : shape[1], : shape[2]]
+        else:
+            voxel_data = self._open(shard["voxels"])[local_idx]
+        if self.transform:
+            voxel_data = self.transform(voxel_data)
+        return {"voxels": voxel_data}
+
+    def get_metadata(self, idx: int) -> Dict[str, Any]:
+        """Style, prompt and config of a sample"""
+        shard_index, local_idx = self._locate(idx)
+        return self._shard_metadata(shard_index)[local_idx]
+
+    def _shard_metadata(self, shard_index: int) -> List[Dict[str, Any]]:
+        if shard_index not in self._metadata_cache:
+            metadata_path = self.dataset_path / self.shards[shard_index]["metadata"]
+            with open(metadata_path, "r") as f:
+                self._metadata_cache[shard_index] = json.load(f)
+        return self._metadata_cache[shard_index]
@@ -1,9 +1,9 @@
-import numpy as np
+from src.dataset.BuildingVoxelDataset import BuildingVoxelDataset
 
 
 if __name__ == "__main__":
-    dataset = np.load(
-        "E:\\Programming\\projects\\AiGenerationProjects\\StableDiffusionTest\\src\\dataset\\training_data_20250119_231048/voxels.npy",
-        allow_pickle=True,
+    dataset = BuildingVoxelDataset(
+        "E:\\Programming\\projects\\AiGenerationProjects\\StableDiffusionTest\\src\\dataset\\training_data_20250119_231048",
     )
-    print(f"Dataset shape: {dataset.shape}")
+    print(f"Dataset size: {len(dataset)}")
+    print(f"First sample shape: {dataset[0]['voxels'].shape}")
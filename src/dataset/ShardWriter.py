@@ -0,0 +1,148 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.dataset.utils import ComplexEncoder
+from src.utils.encoding import encode_batch
+
+MANIFEST_NAME = "manifest.json"
+
+
+def get_bucket(shape: Tuple[int, ...], bucket_sizes: Sequence[int]) -> int:
+    """Smallest bucket edge length that fits every dimension of a shape
+
+    Shapes larger than the largest bucket get their own bucket, rounded up to a
+    multiple of the smallest bucket size.
+    """
+    extent = max(shape)
+    for size in sorted(bucket_sizes):
+        if extent <= size:
+            return size
+    step = min(bucket_sizes)
+    return -(-extent // step) * step
+
+
+class ShardWriter:
+    """Stream voxel samples to disk in fixed-size shards.
+
+    Samples are buffered until ``shard_size`` of them are collected, then padded
+    to the largest sample in that shard and written as ``shard_XXXXX.npy`` with a
+    matching ``shard_XXXXX.json`` holding the per-sample metadata and
+    ``shard_XXXXX.shapes.npy`` holding the true (X, Y, Z) size of every sample.
+    After every shard the manifest is rewritten atomically, so readers can start
+    on finished shards while later ones are still being produced.
+
+    With ``encoding="rle"`` samples are instead stored unpadded, run-length
+    encoded with 4-bit packed values, in a single ``shard_XXXXX.rle.npz``.
+
+    With ``bucket_sizes`` samples are grouped by size before sharding, so a
+    shard only holds samples of one bucket and is padded to that bucket's true
+    extents instead of to the largest building of the whole dataset.
+    """
+
+    def __init__(
+        self,
+        output_path: Path,
+        shard_size: int = 4096,
+        encoding: str = "dense",
+        bucket_sizes: Optional[Sequence[int]] = None,
+    ):
+        if encoding not in ("dense", "rle"):
+            raise ValueError(f"Unknown voxel encoding: {encoding}")
+        self.output_path = Path(output_path)
+        self.output_path.mkdir(parents=True, exist_ok=True)
+        self.shard_size = shard_size
+        self.encoding = encoding
+        self.bucket_sizes = list(bucket_sizes) if bucket_sizes else None
+        self.shards: List[Dict[str, Any]] = []
+        self.num_samples = 0
+        # Buffered samples and their metadata per bucket (None when unbucketed)
+        self._buffers: Dict[Optional[int], Tuple[List[np.ndarray], List[Dict]]] = {}
+        self._write_manifest(complete=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Keep the manifest marked incomplete if generation failed
+        if exc_type is None:
+            self.close()
+
+    def add(self, voxels: np.ndarray, metadata: Dict[str, Any]):
+        """Queue one sample, writing a shard once enough samples are buffered"""
+        bucket = None
+        if self.bucket_sizes:
+            bucket = get_bucket(voxels.shape, self.bucket_sizes)
+        buffered_voxels, buffered_metadata = self._buffers.setdefault(bucket, ([], []))
+        buffered_voxels.append(voxels)
+        buffered_metadata.append(metadata)
+        if len(buffered_voxels) >= self.shard_size:
+            self._write_shard(bucket)
+
+    def flush(self):
+        """Write all buffered samples as new shards"""
+        for bucket in list(self._buffers):
+            self._write_shard(bucket)
+
+    def _write_shard(self, bucket: Optional[int]):
+        voxels_list, metadata = self._buffers.pop(bucket, ([], []))
+        if not voxels_list:
+            return
+
+        shard_shape = tuple(
+            int(n) for n in np.max([v.shape for v in voxels_list], axis=0)
+        )
+        name = f"shard_{len(self.shards):05d}"
+        if self.encoding == "rle":
+            files = {"voxels": f"{name}.rle.npz"}
+            np.savez(self.output_path / files["voxels"], **encode_batch(voxels_list))
+        else:
+            files = {"voxels": f"{name}.npy", "shapes": f"{name}.shapes.npy"}
+            shard = np.zeros((len(voxels_list), *shard_shape), dtype=np.int8)
+            for i, voxels in enumerate(voxels_list):
+                shard[i, : voxels.shape[0], : voxels.shape[1], : voxels.shape[2]] = (
+                    voxels
+                )
+            np.save(self.output_path / files["voxels"], shard)
+            np.save(
+                self.output_path / files["shapes"],
+                np.array([v.shape for v in voxels_list], dtype=np.int32),
+            )
+        with open(self.output_path / f"{name}.json", "w") as f:
+            json.dump(metadata, f, cls=ComplexEncoder)
+
+        self.shards.append(
+            {
+                **files,
+                "encoding": self.encoding,
+                "metadata": f"{name}.json",
+                "num_samples": len(voxels_list),
+                "shape": list(shard_shape),
+                "bucket": bucket,
+            }
+        )
+        self.num_samples += len(voxels_list)
+        self._write_manifest(complete=False)
+
+    def close(self):
+        """Write the remaining samples and mark the dataset complete"""
+        self.flush()
+        self._write_manifest(complete=True)
+
+    def _write_manifest(self, complete: bool):
+        manifest = {
+            "format": "sharded",
+            "complete": complete,
+            "num_samples": self.num_samples,
+            "shard_size": self.shard_size,
+            "bucket_sizes": self.bucket_sizes,
+            "shards": self.shards,
+        }
+        # Write then rename so readers never see a half-written manifest
+        tmp_path = self.output_path / f"{MANIFEST_NAME}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.output_path / MANIFEST_NAME)
@@ -0,0 +1,114 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+from torch.utils.data import get_worker_info
+
+from src.dataset.BucketBatchSampler import pad_collate
+from src.renderer.materials import Material
+
+
+class VoxelAugmentation:
+    """Random rotations, flips and shifts of a whole (B, X, Y, Z) batch.
+
+    Every grid gets its own random quarter turn about the vertical axis, an
+    optional mirror flip along x and an optional shift of up to ``max_shift``
+    voxels on x and z. Together rotation and flip cover all 8 symmetries of
+    the ground plane. Instead of transforming grids one by one, the source
+    position of every output column is computed for the batch at once and
+    the batch is transformed with a single indexed gather.
+
+    Voxels shifted or rotated in from outside the input are air. With
+    rotations enabled x and z are padded to the larger of the two, so a
+    quarter turn never cuts off a building.
+
+    Use ``collate`` as ``collate_fn`` of a DataLoader over a dataset of class
+    indices (e.g. ``VoxelTensorCache`` with ``storage="indices"``).
+    """
+
+    def __init__(
+        self,
+        rotate: bool = True,
+        flip: bool = True,
+        max_shift: int = 0,
+        seed: Optional[int] = None,
+    ):
+        self.rotate = rotate
+        self.flip = flip
+        self.max_shift = max_shift
+        self.seed = seed
+        self._rng: Optional[np.random.Generator] = None
+        self._rng_worker: Optional[int] = None
+
+    def _get_rng(self) -> np.random.Generator:
+        # Forked DataLoader workers inherit the generator, so give each its own
+        info = get_worker_info()
+        worker = info.id if info is not None else None
+        if self._rng is None or self._rng_worker != worker:
+            seed = self.seed if self.seed is not None else torch.initial_seed()
+            self._rng = np.random.default_rng(
+                (seed, 0 if worker is None else worker + 1)
+            )
+            self._rng_worker = worker
+        return self._rng
+
+    def sample(self, batch_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Random quarter turns (B,), flips (B,) and x/z shifts (B, 2)"""
+        rng = self._get_rng()
+        turns = rng.integers(0, 4 if self.rotate else 1, size=batch_size)
+        flips = (
+            rng.random(batch_size) < 0.5 if self.flip else np.zeros(batch_size, bool)
+        )
+        shifts = rng.integers(-self.max_shift, self.max_shift + 1, size=(batch_size, 2))
+        return turns, flips, shifts
+
+    def apply(
+        self,
+        voxels: np.ndarray,
+        turns: np.ndarray,
+        flips: np.ndarray,
+        shifts: np.ndarray,
+    ) -> np.ndarray:
+        """Flip, then rotate like ``np.rot90(axes=(0, 2))``, then shift"""
+        batch_size, size_x, size_y, size_z = voxels.shape
+        if self.rotate:
+            size_x = size_z = max(size_x, size_z)
+
+        # Source grid as (B, X, Z, Y) columns with an air row and column
+        # appended, which is where all out of range positions read from
+        columns = np.full(
+            (batch_size, voxels.shape[1] + 1, voxels.shape[3] + 1, size_y),
+            Material.AIR,
+            dtype=voxels.dtype,
+        )
+        columns[:, :-1, :-1] = voxels.transpose(0, 1, 3, 2)
+
+        # Walk back from every output column to its source column
+        x = np.arange(size_x)[None, :, None] - shifts[:, 0, None, None]
+        z = np.arange(size_z)[None, None, :] - shifts[:, 1, None, None]
+        x, z = np.broadcast_arrays(x, z)
+        turns = turns[:, None, None]
+        last = size_x - 1
+        x, z = (
+            np.select([turns == 1, turns == 2, turns == 3], [z, last - x, last - z], x),
+            np.select([turns == 1, turns == 2, turns == 3], [last - x, last - z, x], z),
+        )
+        x = np.where(flips[:, None, None], size_x - 1 - x, x)
+
+        valid = (x >= 0) & (x < voxels.shape[1]) & (z >= 0) & (z < voxels.shape[3])
+        x = np.where(valid, x, voxels.shape[1])
+        z = np.where(valid, z, voxels.shape[3])
+        batch = np.arange(batch_size)[:, None, None]
+        return columns[batch, x, z].transpose(0, 1, 3, 2)
+
+    def __call__(self, voxels: np.ndarray) -> np.ndarray:
+        return self.apply(voxels, *self.sample(len(voxels)))
+
+    def collate(self, batch: List[Dict]) -> Dict[str, torch.Tensor]:
+        """``pad_collate`` followed by augmenting the padded batch
+
+        The batch stays int8 class indices, which makes the gather about 5x
+        faster than on int64; encodings widen them on the device.
+        """
+        voxels = pad_collate(batch, dtype=np.int8)["voxels"].numpy()
+        return {"voxels": torch.from_numpy(self(voxels))}
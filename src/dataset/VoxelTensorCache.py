@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+
+from src.dataset.BuildingVoxelDataset import BuildingVoxelDataset
+from src.dataset.ShardWriter import MANIFEST_NAME
+from src.renderer.materials import Material
+
+CACHE_DIR_NAME = "tensor_cache"
+
+
+class VoxelTensorCache(Dataset):
+    """Padded, model-ready voxel tensors materialized once into a memmap.
+
+    The first time a dataset is used with a target size, every sample is
+    centre-padded to ``target_size`` and written to
+    ``<dataset>/tensor_cache/<hash>_<X>x<Y>x<Z>_<storage>.npy``. Later runs and
+    all DataLoader workers only memory-map that file, so ``__getitem__`` is a
+    single copy instead of pad, one-hot, permute and rescale on the CPU.
+
+    With ``storage="indices"`` samples are int8 class indices of shape
+    (X, Y, Z), meant to be expanded on the device with an encoding from
+    ``src.model.VoxelEncoding``. With ``storage="half"`` they are float16
+    one-hot tensors of shape (C, X, Y, Z) scaled to [-1, 1].
+
+    The hash covers the manifest (or single-file layout) and the size and
+    modification time of every voxel file, so regenerating the dataset
+    creates a new cache and removes the stale one.
+    """
+
+    def __init__(
+        self,
+        dataset: BuildingVoxelDataset,
+        target_size: Tuple[int, int, int],
+        storage: str = "indices",
+        num_classes: int = len(Material),
+        cache_dir: Optional[Path] = None,
+    ):
+        if storage not in ("indices", "half"):
+            raise ValueError(f"Unknown cache storage: {storage}")
+        self.dataset = dataset
+        self.target_size = tuple(int(n) for n in target_size)
+        self.storage = storage
+        self.num_classes = num_classes
+        self.cache_dir = Path(cache_dir or dataset.dataset_path / CACHE_DIR_NAME)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        size = "x".join(str(n) for n in self.target_size)
+        self.suffix = f"_{size}_{storage}.npy"
+        self.cache_path = (
+            self.cache_dir / f"{self.get_dataset_hash(dataset)}{self.suffix}"
+        )
+        if not self.cache_path.exists():
+            self._build()
+        self._tensors: Optional[np.ndarray] = None
+
+    @staticmethod
+    def get_dataset_hash(dataset: BuildingVoxelDataset) -> str:
+        """Hash identifying the current generator output of a dataset"""
+        digest = hashlib.sha256()
+        if dataset.sharded:
+            digest.update((dataset.dataset_path / MANIFEST_NAME).read_bytes())
+        for shard in dataset.shards:
+            stat = os.stat(dataset.dataset_path / shard["voxels"])
+            digest.update(
+                f"{shard['voxels']}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+            )
+        return digest.hexdigest()[:16]
+
+    def _pad(self, voxels: np.ndarray) -> np.ndarray:
+        if any(n > t for n, t in zip(voxels.shape, self.target_size)):
+            raise ValueError(
+                f"Sample of shape {voxels.shape} does not fit {self.target_size}"
+            )
+        # Pad evenly on both sides, as the notebook's voxel_transform does
+        padded = np.zeros(self.target_size, dtype=np.int8)
+        start = [(t - n) // 2 for n, t in zip(voxels.shape, self.target_size)]
+        padded[
+            start[0] : start[0] + voxels.shape[0],
+            start[1] : start[1] + voxels.shape[1],
+            start[2] : start[2] + voxels.shape[2],
+        ] = voxels
+        return padded
+
+    def _build(self):
+        transform, self.dataset.transform = self.dataset.transform, None
+        if self.storage == "indices":
+            shape, dtype = (len(self.dataset), *self.target_size), np.int8
+        else:
+            shape = (len(self.dataset), self.num_classes, *self.target_size)
+            dtype = np.float16
+        # Write next to the final file and rename, so an interrupted build is
+        # never mistaken for a finished cache. Every builder gets its own
+        # file, so concurrent builds (e.g. one per DDP rank) never share one.
+        tmp_path = self.cache_dir / (
+            f"{self.cache_path.stem}.{os.getpid()}.{uuid.uuid4().hex}.tmp.npy"
+        )
+        try:
+            tensors = np.lib.format.open_memmap(
+                tmp_path, mode="w+", dtype=dtype, shape=shape
+            )
+            eye = np.eye(self.num_classes, dtype=np.float16) * 2 - 1
+            for i in range(len(self.dataset)):
+                padded = self._pad(self.dataset[i]["voxels"])
+                if self.storage == "indices":
+                    tensors[i] = padded
+                else:
+                    tensors[i] = np.moveaxis(eye[padded], -1, 0)
+            tensors.flush()
+            del tensors
+            os.replace(tmp_path, self.cache_path)
+        finally:
+            self.dataset.transform = transform
+            tmp_path.unlink(missing_ok=True)
+
+        # Caches of earlier generator output for this size are stale now
+        for path in self.cache_dir.glob(f"*{self.suffix}"):
+            if path != self.cache_path:
+                path.unlink(missing_ok=True)
+
+    def _open(self) -> np.ndarray:
+        # Opened lazily so every DataLoader worker maps the file itself
+        if self._tensors is None:
+            self._tensors = np.load(self.cache_path, mmap_mode="r")
+        return self._tensors
+
+    def __getstate__(self):
+        # Pickling a memmap would copy its contents into every worker
+        state = self.__dict__.copy()
+        state["_tensors"] = None
+        return state
+
+    def __len__(self):
+        return len(self._open())
+
+    def __getitem__(self, idx) -> Dict[str, torch.Tensor]:
+        return {"voxels": torch.from_numpy(np.array(self._open()[idx]))}
+
+    def get_metadata(self, idx: int) -> Dict[str, Any]:
+        """Style, prompt and config of a sample"""
+        return self.dataset.get_metadata(idx)
+
+    def describe(self) -> Dict[str, Any]:
+        """Cache location and layout, e.g. for logging"""
+        tensors = self._open()
+        return {
+            "path": str(self.cache_path),
+            "storage": self.storage,
+            "shape": list(tensors.shape),
+            "bytes": int(tensors.nbytes),
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Precompute a voxel tensor cache")
+    parser.add_argument("dataset_path", type=Path)
+    parser.add_argument("--size", type=int, nargs=3, required=True)
+    parser.add_argument("--storage", choices=("indices", "half"), default="indices")
+    args = parser.parse_args()
+
+    cache = VoxelTensorCache(
+        BuildingVoxelDataset(args.dataset_path), args.size, storage=args.storage
+    )
+    print(json.dumps(cache.describe(), indent=2))
@@ -0,0 +1,414 @@
+import math
+from abc import ABC, abstractmethod
+from typing import Optional, Sequence
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.utils.checkpoint import checkpoint
+
+
+def get_timestep_embedding(timesteps, embedding_dim=256):
+    """
+    Create sinusoidal timestep embeddings.
+    :param timesteps: a 1-D Tensor of N indices, one per batch element.
+    :param embedding_dim: the dimension of the output.
+    :return: an [N x embedding_dim] Tensor of positional embeddings.
+    """
+    half_dim = embedding_dim // 2
+    emb = math.log(10000) / (half_dim - 1)
+    emb = torch.exp(torch.arange(half_dim, device=timesteps.device) * -emb)
+    emb = timesteps[:, None] * emb[None, :]
+    emb = torch.cat([torch.sin(emb), torch.cos(emb)], dim=-1)
+    return emb
+
+
+def set_gradient_checkpointing(model: nn.Module, enabled: bool = True):
+    """Recompute activations of every checkpointable block in the backward pass"""
+    for module in model.modules():
+        if hasattr(module, "gradient_checkpointing"):
+            module.gradient_checkpointing = enabled
+
+
+def optimize_model(
+    model: nn.Module, channels_last: bool = True, compile: bool = False, **kwargs
+) -> nn.Module:
+    """Move a model to channels-last-3d memory and optionally compile it
+
+    Inputs should be converted with ``x.to(memory_format=torch.channels_last_3d)``
+    as well, otherwise every convolution converts them again. ``kwargs`` are
+    passed to ``torch.compile``.
+    """
+    if channels_last:
+        model = model.to(memory_format=torch.channels_last_3d)
+    if compile:
+        model.compile(**kwargs)
+    return model
+
+
+class CheckpointedBlock(nn.Module, ABC):
+    """Block whose activations can be recomputed instead of stored
+
+    Subclasses implement ``_forward``; ``forward`` wraps it in a checkpoint
+    while gradient checkpointing is enabled.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.gradient_checkpointing = False
+
+    def forward(self, *args):
+        if self.gradient_checkpointing and self.training and torch.is_grad_enabled():
+            return checkpoint(self._forward, *args, use_reentrant=False)
+        return self._forward(*args)
+
+    @abstractmethod
+    def _forward(self, *args):
+        pass
+
+
+class SelfAttention3D(CheckpointedBlock):
+    """Multi-head self-attention over the voxels of a 3D feature map
+
+    Grids larger than ``window_size`` on any axis are split into
+    non-overlapping windows of ``window_size``^3 voxels which attend only
+    within themselves, so cost grows linearly with the volume instead of
+    quadratically. Grids that fit one window get full attention. Axes that
+    are not a multiple of the window are zero-padded, and the padding is
+    masked out so real voxels never attend to it. Attention runs through
+    ``F.scaled_dot_product_attention``, which never materializes the full
+    attention matrix, with the weights of ``nn.MultiheadAttention`` so
+    existing checkpoints still load.
+    """
+
+    def __init__(self, channels, num_heads=4, window_size: Optional[int] = None):
+        super().__init__()
+        self.channels = channels
+        self.num_heads = num_heads
+        self.window_size = window_size
+        self.mha = nn.MultiheadAttention(channels, num_heads, batch_first=True)
+        self.ln = nn.LayerNorm([channels])
+        self.ff_self = nn.Sequential(
+            nn.LayerNorm([channels]),
+            nn.Linear(channels, channels),
+            nn.GELU(),
+            nn.Linear(channels, channels),
+        )
+
+    def _attention(self, x, mask=None):
+        # (B, N, C) tokens to (B, N, C) attention output, mask is True for the
+        # keys every query may attend to
+        batch, tokens, _ = x.shape
+        q, k, v = F.linear(x, self.mha.in_proj_weight, self.mha.in_proj_bias).chunk(
+            3, dim=-1
+        )
+        q, k, v = (
+            t.reshape(batch, tokens, self.num_heads, -1).transpose(1, 2)
+            for t in (q, k, v)
+        )
+        out = F.scaled_dot_product_attention(q, k, v, attn_mask=mask)
+        out = out.transpose(1, 2).reshape(batch, tokens, self.channels)
+        return self.mha.out_proj(out)
+
+    def _to_windows(self, x):
+        # (B, C, X, Y, Z) to (B * windows, window^3, C)
+        w = self.window_size
+        batch, channels = x.shape[:2]
+        padding = []
+        for size in reversed(x.shape[2:]):
+            padding += [0, -size % w]
+        x = F.pad(x, padding)
+        nx, ny, nz = (size // w for size in x.shape[2:])
+        x = x.reshape(batch, channels, nx, w, ny, w, nz, w)
+        x = x.permute(0, 2, 4, 6, 3, 5, 7, 1)
+        return x.reshape(batch * nx * ny * nz, w**3, channels), (nx, ny, nz)
+
+    def _window_mask(self, size, batch, device):
+        # (B * windows, 1, 1, window^3) mask of the real voxels, or None if
+        # the grid needs no padding. Every window holds at least one real
+        # voxel, so no query is left without keys.
+        if all(n % self.window_size == 0 for n in size):
+            return None
+        mask, _ = self._to_windows(torch.ones(1, 1, *size, device=device))
+        mask = mask.reshape(-1, 1, 1, self.window_size**3) > 0
+        return mask.repeat(batch, 1, 1, 1)
+
+    def _from_windows(self, x, counts, size):
+        w = self.window_size
+        nx, ny, nz = counts
+        batch = x.shape[0] // (nx * ny * nz)
+        x = x.reshape(batch, nx, ny, nz, w, w, w, self.channels)
+        x = x.permute(0, 7, 1, 4, 2, 5, 3, 6)
+        x = x.reshape(batch, self.channels, nx * w, ny * w, nz * w)
+        return x[:, :, : size[0], : size[1], : size[2]]
+
+    def _forward(self, x):
+        size = x.shape[-3:]
+        windowed = self.window_size is not None and max(size) > self.window_size
+        mask = None
+        if windowed:
+            mask = self._window_mask(size, x.shape[0], x.device)
+            x, counts = self._to_windows(x)
+        else:
+            x = x.reshape(x.shape[0], self.channels, -1).transpose(1, 2)
+        attention_value = self._attention(self.ln(x), mask) + x
+        attention_value = self.ff_self(attention_value) + attention_value
+        if windowed:
+            return self._from_windows(attention_value, counts, size)
+        return attention_value.transpose(1, 2).reshape(-1, self.channels, *size)
+
+
+class DoubleConv3D(CheckpointedBlock):
+    def __init__(self, in_channels, out_channels):
+        super().__init__()
+        self.double_conv = nn.Sequential(
+            nn.Conv3d(in_channels, out_channels, kernel_size=3, padding=1),
+            nn.GroupNorm(8, out_channels),
+            nn.GELU(),
+            nn.Conv3d(out_channels, out_channels, kernel_size=3, padding=1),
+            nn.GroupNorm(8, out_channels),
+            nn.GELU(),
+        )
+
+    def _forward(self, x):
+        return self.double_conv(x)
+
+
+class Down3D(nn.Module):
+    def __init__(
+        self,
+        in_channels,
+        out_channels,
+        use_attention=False,
+        attention_window: Optional[int] = None,
+    ):
+        super().__init__()
+        self.maxpool_conv = nn.Sequential(
+            nn.MaxPool3d(2), DoubleConv3D(in_channels, out_channels)
+        )
+        self.use_attention = use_attention
+        if use_attention:
+            self.attention = SelfAttention3D(out_channels, window_size=attention_window)
+
+    def forward(self, x):
+        x = self.maxpool_conv(x)
+        if self.use_attention:
+            x = self.attention(x)
+        return x
+
+
+class Up3D(nn.Module):
+    def __init__(
+        self,
+        in_channels,
+        out_channels,
+        use_attention=False,
+        attention_window: Optional[int] = None,
+    ):
+        super().__init__()
+        self.up = nn.ConvTranspose3d(
+            in_channels, in_channels // 2, kernel_size=2, stride=2
+        )
+        self.conv = DoubleConv3D(in_channels, out_channels)
+        self.use_attention = use_attention
+        if use_attention:
+            self.attention = SelfAttention3D(out_channels, window_size=attention_window)
+
+    def forward(self, x1, x2):
+        x1 = self.up(x1)
+        # Handling cases where sizes don't match perfectly
+        diff_x = x2.size()[2] - x1.size()[2]
+        diff_y = x2.size()[3] - x1.size()[3]
+        diff_z = x2.size()[4] - x1.size()[4]
+        x1 = F.pad(
+            x1,
+            [
+                diff_z // 2,
+                diff_z - diff_z // 2,
+                diff_y // 2,
+                diff_y - diff_y // 2,
+                diff_x // 2,
+                diff_x - diff_x // 2,
+            ],
+        )
+        x = torch.cat([x2, x1], dim=1)
+        x = self.conv(x)
+        if self.use_attention:
+            x = self.attention(x)
+        return x
+
+
+# Modified VAE with simpler decoder that doesn't use skip connections
+class VoxelVAE(nn.Module):
+    def __init__(self, in_channels, latent_dim=4, voxel_size=32):
+        super().__init__()
+        # Encoder
+        self.encoder = nn.Sequential(
+            DoubleConv3D(in_channels, 32), Down3D(32, 64), Down3D(64, 128)
+        )
+        # Latent space
+        encoded_size = voxel_size // 4
+        self.fc_mu = nn.Linear(128 * encoded_size**3, latent_dim)
+        self.fc_var = nn.Linear(128 * encoded_size**3, latent_dim)
+
+        # Modified decoder without skip connections
+        self.decoder_size = voxel_size // 8
+        self.decoder_input = nn.Linear(latent_dim, 128 * self.decoder_size**3)
+        self.decoder = nn.Sequential(
+            nn.ConvTranspose3d(128, 64, kernel_size=2, stride=2),
+            DoubleConv3D(64, 64),
+            nn.ConvTranspose3d(64, 32, kernel_size=2, stride=2),
+            DoubleConv3D(32, 32),
+            nn.ConvTranspose3d(32, 32, kernel_size=2, stride=2),
+            DoubleConv3D(32, 32),
+            nn.Conv3d(32, in_channels, kernel_size=1),
+        )
+
+    def encode(self, x):
+        x = self.encoder(x)
+        x = x.reshape(x.size(0), -1)
+        mu = self.fc_mu(x)
+        log_var = self.fc_var(x)
+        return mu, log_var
+
+    def decode(self, z):
+        x = self.decoder_input(z)
+        x = x.view(x.size(0), 128, *(self.decoder_size,) * 3)
+        x = self.decoder(x)
+        return x
+
+    def reparameterize(self, mu, log_var):
+        std = torch.exp(0.5 * log_var)
+        eps = torch.randn_like(std)
+        return mu + eps * std
+
+    def forward(self, x):
+        mu, log_var = self.encode(x)
+        z = self.reparameterize(mu, log_var)
+        return self.decode(z), mu, log_var
+
+
+class UNet3DModel(nn.Module):
+    """3D UNet with attention only in its two coarsest blocks
+
+    ``attention_window`` bounds the attention cost: feature maps larger than
+    the window on any axis attend within ``attention_window``^3 windows. With
+    the default of 8 a 32^3 grid gets full attention as before, while a 64^3
+    grid attends over 8^3 windows in its 16^3 up block instead of over all
+    4096 voxels at once.
+    """
+
+    def __init__(
+        self,
+        in_channels,
+        out_channels,
+        block_out_channels: Sequence[int] = (64, 128, 256, 512),
+        embedding_dim=256,
+        attention_window: Optional[int] = 8,
+    ):
+        super().__init__()
+
+        # Initial convolution
+        self.inc = DoubleConv3D(in_channels, block_out_channels[0])
+
+        # Down blocks
+        self.down1 = Down3D(block_out_channels[0], block_out_channels[1])
+        self.down2 = Down3D(block_out_channels[1], block_out_channels[2])
+        self.down3 = Down3D(
+            block_out_channels[2],
+            block_out_channels[3],
+            use_attention=True,
+            attention_window=attention_window,
+        )
+
+        # Up blocks
+        self.up1 = Up3D(
+            block_out_channels[3],
+            block_out_channels[2],
+            use_attention=True,
+            attention_window=attention_window,
+        )
+        self.up2 = Up3D(block_out_channels[2], block_out_channels[1])
+        self.up3 = Up3D(block_out_channels[1], block_out_channels[0])
+
+        # Output convolution
+        self.outc = nn.Conv3d(block_out_channels[0], out_channels, kernel_size=1)
+
+        # Time embedding
+        time_emb_dim = block_out_channels[0] * 4
+        self.time_mlp = nn.Sequential(
+            nn.Linear(embedding_dim, time_emb_dim),
+            nn.GELU(),
+            nn.Linear(time_emb_dim, time_emb_dim),
+        )
+
+    def enable_gradient_checkpointing(self):
+        """Trade a second forward pass per block for much less activation memory"""
+        set_gradient_checkpointing(self, True)
+
+    def disable_gradient_checkpointing(self):
+        set_gradient_checkpointing(self, False)
+
+    def forward(self, x, timesteps):
+        # Time embedding
+        emb = get_timestep_embedding(timesteps)
+        emb = self.time_mlp(emb)
+
+        # Initial conv
+        x1 = self.inc(x)
+
+        # Downsample
+        x2 = self.down1(x1)
+        x3 = self.down2(x2)
+        x4 = self.down3(x3)
+
+        # Upsample with skip connections
+        x = self.up1(x4, x3)
+        x = self.up2(x, x2)
+        x = self.up3(x, x1)
+
+        # Output conv
+        output = self.outc(x)
+
+        return output
+
+
+class VoxelDiffusion(nn.Module):
+    def __init__(
+        self,
+        voxel_channels,
+        voxel_size=32,
+        latent_dim=4,
+        attention_window: Optional[int] = 8,
+    ):
+        super().__init__()
+        self.vae = VoxelVAE(
+            in_channels=voxel_channels, latent_dim=latent_dim, voxel_size=voxel_size
+        )
+        self.unet = UNet3DModel(
+            in_channels=voxel_channels,
+            out_channels=voxel_channels,
+            attention_window=attention_window,
+        )
+
+    def enable_gradient_checkpointing(self):
+        """Trade a second forward pass per block for much less activation memory"""
+        set_gradient_checkpointing(self, True)
+
+    def disable_gradient_checkpointing(self):
+        set_gradient_checkpointing(self, False)
+
+    def encode(self, x):
+        return self.vae.encode(x)
+
+    def decode(self, z):
+        return self.vae.decode(z)
+
+    def forward(self, x, timesteps):
+        # Get latent representation
+        latent, mu, log_var = self.vae(x)
+
+        # Apply UNet in latent space
+        noise_pred = self.unet(latent, timesteps)
+
+        return noise_pred, mu, log_var
@@ -0,0 +1,172 @@
+import json
+import os
+from typing import Optional, Tuple, Union
+
+import torch
+import torch.nn.functional as F
+from diffusers import DDIMScheduler, DDPMScheduler, DPMSolverMultistepScheduler
+from safetensors.torch import load_file, save_file
+
+from src.model.VoxelEncoding import get_encoding
+
+# Few-step schedulers sampling models trained with a DDPM schedule
+FAST_SCHEDULERS = {
+    "ddim": DDIMScheduler,
+    "dpm": DPMSolverMultistepScheduler,
+}
+
+
+def get_fast_scheduler(scheduler, kind: str = "dpm"):
+    """Few-step scheduler sharing the training scheduler's noise schedule"""
+    if kind not in FAST_SCHEDULERS:
+        raise ValueError(f"Unknown scheduler kind: {kind}")
+    return FAST_SCHEDULERS[kind].from_config(scheduler.config)
+
+
+class VoxelDiffusionPipeline:
+    """Generate one-hot voxel grids from noise with a trained denoiser.
+
+    Sampling runs under ``torch.inference_mode`` in micro-batches of at most
+    ``micro_batch_size`` grids, with the noise, timestep and result buffers
+    allocated once per call. Any requested number of buildings is generated
+    with bounded memory. Pair the pipeline with a DDIM or DPM-Solver scheduler
+    (``get_fast_scheduler``) to sample in 20-50 steps instead of the 1000 the
+    model was trained with.
+
+    ``voxel_channels`` is the number of material classes; the model works on
+    their ``encoding`` ("onehot" or the compact "bits", see ``VoxelEncoding``).
+    ``voxel_size`` is the edge length of a cubic grid or an (X, Y, Z) shape.
+
+    The denoising steps of a micro-batch run one after another; sampling is
+    not parallel in time.
+    """
+
+    def __init__(
+        self,
+        unet: torch.nn.Module,
+        scheduler,
+        voxel_channels: int,
+        voxel_size: Union[int, Tuple[int, int, int]],
+        encoding: str = "onehot",
+    ):
+        self.unet = unet
+        self.scheduler = scheduler
+        self.voxel_channels = voxel_channels
+        self.voxel_size = voxel_size
+        self.encoding = get_encoding(encoding, voxel_channels)
+        self.device = next(unet.parameters()).device
+
+    def save_pretrained(self, save_directory: str):
+        """Save the pipeline's models and scheduler."""
+        os.makedirs(save_directory, exist_ok=True)
+        save_file(
+            self.unet.state_dict(), os.path.join(save_directory, "model.safetensors")
+        )
+        self.scheduler.save_config(save_directory)
+        with open(os.path.join(save_directory, "pipeline_config.json"), "w") as f:
+            json.dump(
+                {
+                    "voxel_channels": self.voxel_channels,
+                    "voxel_size": self.voxel_size,
+                    "encoding": self.encoding.name,
+                },
+                f,
+                indent=2,
+            )
+
+    @classmethod
+    def load_pretrained(
+        cls, save_directory: str, unet: torch.nn.Module, scheduler_class=None
+    ):
+        """Load weights into ``unet`` and restore the scheduler and grid size"""
+        unet.load_state_dict(
+            load_file(os.path.join(save_directory, "model.safetensors"))
+        )
+        scheduler_class = scheduler_class or DDPMScheduler
+        scheduler = scheduler_class.from_pretrained(save_directory)
+        with open(os.path.join(save_directory, "pipeline_config.json"), "r") as f:
+            pipeline_config = json.load(f)
+        return cls(unet, scheduler, **pipeline_config)
+
+    def _predict(self, sample: torch.Tensor, timestep: torch.Tensor) -> torch.Tensor:
+        output = self.unet(sample, timestep)
+        # Models with auxiliary outputs (e.g. VAE statistics) return tuples
+        return output[0] if isinstance(output, tuple) else output
+
+    def __call__(
+        self,
+        batch_size: int = 1,
+        num_inference_steps: int = 25,
+        micro_batch_size: int = 8,
+        generator: Optional[torch.Generator] = None,
+        output_type: str = "onehot",
+        return_dict: bool = True,
+    ) -> Union[dict, torch.Tensor]:
+        """Sample ``batch_size`` voxel grids
+
+        Args:
+            batch_size: Number of grids to generate in total
+            num_inference_steps: Denoising steps per grid
+            micro_batch_size: Grids denoised together in one forward pass
+            generator: Random generator; noise is drawn on its device
+            output_type: "channels" for the (N, C, X, Y, Z) model channels
+                mapped to [0, 1], "onehot" for (N, voxel_channels, X, Y, Z)
+                values per material (the channels themselves with the one-hot
+                encoding, the decoded bits one-hot encoded otherwise) or
+                "indices" for (N, X, Y, Z) uint8 material IDs, which needs C
+                times less memory for large batches
+
+        Returns:
+            ``{"voxels": tensor}`` on the CPU, or the tensor itself
+        """
+        if output_type not in ("channels", "onehot", "indices"):
+            raise ValueError(f"Unknown output type: {output_type}")
+        if output_type == "onehot" and self.encoding.name == "onehot":
+            # The model channels already are one per material
+            output_type = "channels"
+        if isinstance(self.voxel_size, int):
+            grid = (self.voxel_size,) * 3
+        else:
+            grid = tuple(self.voxel_size)
+        channels = self.encoding.channels
+        if output_type == "channels":
+            result = torch.empty((batch_size, channels, *grid))
+        elif output_type == "onehot":
+            result = torch.empty((batch_size, self.voxel_channels, *grid))
+        else:
+            result = torch.empty((batch_size, *grid), dtype=torch.uint8)
+
+        micro_batch_size = min(micro_batch_size, batch_size)
+        noise_device = generator.device if generator is not None else self.device
+        noise = torch.empty((micro_batch_size, channels, *grid), device=noise_device)
+        timestep = torch.empty(micro_batch_size, dtype=torch.long, device=self.device)
+
+        with torch.inference_mode():
+            for start in range(0, batch_size, micro_batch_size):
+                n = min(micro_batch_size, batch_size - start)
+                torch.randn(noise.shape, generator=generator, out=noise)
+                sample = noise[:n].to(self.device)
+
+                # Resets multistep schedulers between micro-batches
+                self.scheduler.set_timesteps(num_inference_steps, device=self.device)
+                for t in self.scheduler.timesteps:
+                    timestep[:n].fill_(t)
+                    noise_pred = self._predict(sample, timestep[:n])
+                    sample = self.scheduler.step(noise_pred, t, sample).prev_sample
+
+                if output_type == "channels":
+                    # Convert from [-1, 1] range back to [0, 1]
+                    result[start : start + n] = ((sample + 1.0) / 2.0).cpu()
+                elif output_type == "onehot":
+                    one_hot = F.one_hot(
+                        self.encoding.decode(sample), self.voxel_channels
+                    )
+                    result[start : start + n] = one_hot.permute(0, 4, 1, 2, 3).cpu()
+                else:
+                    result[start : start + n] = (
+                        self.encoding.decode(sample).to(torch.uint8).cpu()
+                    )
+
+        if return_dict:
+            return {"voxels": result}
+        return result
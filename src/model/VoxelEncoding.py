@@ -0,0 +1,81 @@
+import math
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+
+class OneHotEncoding:
+    """One channel per material, scaled to [-1, 1]"""
+
+    name = "onehot"
+
+    def __init__(self, num_classes: int):
+        self.num_classes = num_classes
+        self.channels = num_classes
+
+    def encode(self, voxels: torch.Tensor) -> torch.Tensor:
+        """(B, X, Y, Z) class indices to (B, C, X, Y, Z) floats in [-1, 1]"""
+        one_hot = F.one_hot(voxels.long(), num_classes=self.num_classes)
+        return one_hot.permute(0, 4, 1, 2, 3).float() * 2.0 - 1.0
+
+    def decode(self, encoded: torch.Tensor) -> torch.Tensor:
+        """(B, C, X, Y, Z) model output back to (B, X, Y, Z) class indices"""
+        return encoded.argmax(dim=1)
+
+
+class BitEncoding:
+    """Material IDs as ceil(log2(num_classes)) binary channels in {-1, 1}
+
+    Nine materials need 4 channels instead of 9, which more than halves the
+    activations of the first and last convolutions and the noise tensors.
+    Decoding thresholds every channel at 0 and clamps unused bit patterns to
+    the last class.
+    """
+
+    name = "bits"
+
+    def __init__(self, num_classes: int):
+        self.num_classes = num_classes
+        self.channels = max(1, math.ceil(math.log2(num_classes)))
+
+    def _weights(self, device: torch.device) -> torch.Tensor:
+        return (2 ** torch.arange(self.channels, device=device)).view(1, -1, 1, 1, 1)
+
+    def encode(self, voxels: torch.Tensor) -> torch.Tensor:
+        """(B, X, Y, Z) class indices to (B, bits, X, Y, Z) floats in {-1, 1}"""
+        bits = (voxels.long().unsqueeze(1) // self._weights(voxels.device)) % 2
+        return bits.float() * 2.0 - 1.0
+
+    def decode(self, encoded: torch.Tensor) -> torch.Tensor:
+        """(B, bits, X, Y, Z) model output back to (B, X, Y, Z) class indices"""
+        bits = (encoded > 0).long()
+        voxels = (bits * self._weights(encoded.device)).sum(dim=1)
+        return voxels.clamp_(max=self.num_classes - 1)
+
+
+ENCODINGS = {encoding.name: encoding for encoding in (OneHotEncoding, BitEncoding)}
+
+
+def get_encoding(name: str, num_classes: int):
+    """Encoding registered under name for a number of material classes"""
+    if name not in ENCODINGS:
+        raise ValueError(f"Unknown voxel encoding: {name}")
+    return ENCODINGS[name](num_classes)
+
+
+def crop_to_occupied(voxels: np.ndarray) -> np.ndarray:
+    """Crop a voxel grid to the bounding box of its non-air voxels
+
+    Use as dataset transform for datasets padded to a common size (the
+    single-file layout), so ``pad_collate`` only pads batches to the extents
+    the buildings really need.
+    """
+    used = [np.flatnonzero(voxels.any(axis=axes)) for axes in ((1, 2), (0, 2), (0, 1))]
+    if len(used[0]) == 0:
+        return voxels[:1, :1, :1]
+    return voxels[
+        used[0][0] : used[0][-1] + 1,
+        used[1][0] : used[1][-1] + 1,
+        used[2][0] : used[2][-1] + 1,
+    ]
@@ -0,0 +1,151 @@
+from itertools import product
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+from src.renderer.materials import Material
+
+
+class ChunkedVoxels:
+    """Sparse voxel grid made of fixed-size cubic chunks.
+
+    Chunks are only allocated on the first non-air write; a missing chunk stands
+    for a chunk full of air. Reads and writes take contiguous slices and
+    integer indices like a dense NumPy array, integers dropping their axis, and
+    only touch the chunks overlapping the requested box, so the grid can be
+    used wherever ``World`` indexes its voxels.
+    """
+
+    def __init__(
+        self,
+        shape: Tuple[int, int, int],
+        chunk_size: int = 32,
+        dtype=np.int8,
+    ):
+        self.shape = tuple(shape)
+        self.chunk_size = chunk_size
+        self.dtype = np.dtype(dtype)
+        self.chunks: Dict[Tuple[int, int, int], np.ndarray] = {}
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the allocated chunks"""
+        return sum(chunk.nbytes for chunk in self.chunks.values())
+
+    def __array__(self, dtype=None, copy=None):
+        dense = self[:, :, :]
+        return dense if dtype is None else dense.astype(dtype)
+
+    def _normalize(self, key) -> tuple:
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > self.ndim:
+            raise IndexError(f"Too many indices for a {self.ndim}-dimensional grid")
+        return key + (slice(None),) * (self.ndim - len(key))
+
+    def _bounds(self, key) -> Tuple[Tuple[int, int], ...]:
+        """Convert a slice key into (start, stop) pairs per axis"""
+        bounds = []
+        for index, size in zip(self._normalize(key), self.shape):
+            if isinstance(index, slice):
+                start, stop, step = index.indices(size)
+                if step != 1:
+                    raise IndexError("ChunkedVoxels only supports contiguous slices")
+                bounds.append((start, max(start, stop)))
+            else:
+                # Single indices are read as length-one slices, see _squeeze
+                index = int(index) + size if index < 0 else int(index)
+                if not 0 <= index < size:
+                    raise IndexError(f"Index {index} out of bounds for size {size}")
+                bounds.append((index, index + 1))
+        return tuple(bounds)
+
+    def _squeeze(self, key) -> tuple:
+        """Key selecting the result of ``key`` from its length-one-sliced box"""
+        return tuple(
+            slice(None) if isinstance(index, slice) else 0
+            for index in self._normalize(key)
+        )
+
+    def _overlapping(
+        self, bounds: Tuple[Tuple[int, int], ...]
+    ) -> Iterator[Tuple[Tuple[int, int, int], Tuple[slice, ...], Tuple[slice, ...]]]:
+        """Yield chunk index, slice within the chunk and slice within the box"""
+        c = self.chunk_size
+        if any(start >= stop for start, stop in bounds):
+            return
+        ranges = [range(start // c, (stop - 1) // c + 1) for start, stop in bounds]
+        for chunk_index in product(*ranges):
+            in_chunk = []
+            in_box = []
+            for ci, (start, stop) in zip(chunk_index, bounds):
+                lo = max(start, ci * c)
+                hi = min(stop, (ci + 1) * c)
+                in_chunk.append(slice(lo - ci * c, hi - ci * c))
+                in_box.append(slice(lo - start, hi - start))
+            yield chunk_index, tuple(in_chunk), tuple(in_box)
+
+    def __getitem__(self, key) -> np.ndarray:
+        bounds = self._bounds(key)
+        out = np.zeros([stop - start for start, stop in bounds], dtype=self.dtype)
+        for chunk_index, in_chunk, in_box in self._overlapping(bounds):
+            chunk = self.chunks.get(chunk_index)
+            if chunk is not None:
+                out[in_box] = chunk[in_chunk]
+        return out[self._squeeze(key)]
+
+    def __setitem__(self, key, value):
+        bounds = self._bounds(key)
+        box_shape = tuple(stop - start for start, stop in bounds)
+        if 0 in box_shape:
+            return
+        # Integer-indexed axes are missing from the value, but have length one
+        # in the box
+        selected = tuple(
+            n
+            for n, index in zip(box_shape, self._normalize(key))
+            if isinstance(index, slice)
+        )
+        value = np.broadcast_to(np.asarray(value, dtype=self.dtype), selected)
+        value = value.reshape(box_shape)
+
+        for chunk_index, in_chunk, in_box in self._overlapping(bounds):
+            part = value[in_box]
+            chunk = self.chunks.get(chunk_index)
+            if chunk is None:
+                if not part.any():
+                    # Writing air into an unallocated chunk is a no-op
+                    continue
+                chunk = np.full((self.chunk_size,) * 3, Material.AIR, dtype=self.dtype)
+                self.chunks[chunk_index] = chunk
+            chunk[in_chunk] = part
+            if not part.any() and not chunk.any():
+                # Release chunks that have been cleared back to air
+                del self.chunks[chunk_index]
+
+    def any(self, key=None) -> bool:
+        """Whether any non-air voxel lies inside the box (whole grid by default)"""
+        bounds = self._bounds(key if key is not None else ())
+        for chunk_index, in_chunk, _ in self._overlapping(bounds):
+            chunk = self.chunks.get(chunk_index)
+            if chunk is not None and chunk[in_chunk].any():
+                return True
+        return False
+
+    def iter_chunks(self) -> Iterator[Tuple[Tuple[int, int, int], np.ndarray]]:
+        """Yield world offset and voxels of every allocated chunk
+
+        Chunks on the far edges are cropped to the grid shape.
+        """
+        c = self.chunk_size
+        for chunk_index, chunk in self.chunks.items():
+            offset = tuple(ci * c for ci in chunk_index)
+            crop = tuple(
+                slice(0, min(c, size - start))
+                for start, size in zip(offset, self.shape)
+            )
+            yield offset, chunk[crop]
@@ -0,0 +1,65 @@
+from collections import defaultdict
+from typing import Dict, Iterator, Set, Tuple
+
+Footprint = Tuple[int, int, int, int]  # (x_min, z_min, x_max, z_max), max exclusive
+
+
+class FootprintIndex:
+    """Uniform-grid spatial hash over the 2D (x, z) footprints of world objects.
+
+    Every footprint is registered in each grid cell it overlaps, so a query only
+    looks at the few objects sharing a cell with the queried rectangle. The cost
+    of a query depends on the rectangle size and local density, not on the
+    number of objects in the world.
+    """
+
+    def __init__(self, cell_size: int = 32):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], Set[str]] = defaultdict(set)
+        self.footprints: Dict[str, Footprint] = {}
+
+    def _cells(self, footprint: Footprint) -> Iterator[Tuple[int, int]]:
+        x_min, z_min, x_max, z_max = footprint
+        c = self.cell_size
+        for cx in range(x_min // c, (x_max - 1) // c + 1):
+            for cz in range(z_min // c, (z_max - 1) // c + 1):
+                yield cx, cz
+
+    def insert(self, name: str, footprint: Footprint):
+        """Register the footprint of an object"""
+        self.remove(name)
+        self.footprints[name] = footprint
+        for cell in self._cells(footprint):
+            self.cells[cell].add(name)
+
+    def remove(self, name: str):
+        """Forget an object; unknown names are ignored"""
+        footprint = self.footprints.pop(name, None)
+        if footprint is None:
+            return
+        for cell in self._cells(footprint):
+            self.cells[cell].discard(name)
+            if not self.cells[cell]:
+                del self.cells[cell]
+
+    def _overlapping(self, footprint: Footprint) -> Iterator[str]:
+        """Yield names of overlapping objects, possibly more than once"""
+        x_min, z_min, x_max, z_max = footprint
+        for cell in self._cells(footprint):
+            for name in self.cells.get(cell, ()):
+                ox_min, oz_min, ox_max, oz_max = self.footprints[name]
+                if (
+                    ox_min < x_max
+                    and x_min < ox_max
+                    and oz_min < z_max
+                    and z_min < oz_max
+                ):
+                    yield name
+
+    def query(self, footprint: Footprint) -> Set[str]:
+        """Names of all objects whose footprint overlaps the rectangle"""
+        return set(self._overlapping(footprint))
+
+    def is_free(self, footprint: Footprint) -> bool:
+        """Whether no registered footprint overlaps the rectangle"""
+        return next(self._overlapping(footprint), None) is None
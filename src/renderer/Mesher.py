@@ -0,0 +1,174 @@
+from typing import Tuple
+
+import numpy as np
+
+from src.renderer.materials import Material
+
+
+class Mesher:
+    """Greedy, face-culled mesher turning a voxel grid into a single triangle mesh.
+
+    Only faces between a solid voxel and air (or the grid boundary) are emitted.
+    Coplanar faces of the same material are merged into rectangles, first into
+    runs along one in-plane axis and then by stacking identical runs along the
+    other. Everything is done with whole-array NumPy operations, so the cost is
+    independent of the number of Python objects in the scene.
+    """
+
+    def __init__(self, scale_factor: float = 1.0):
+        # Each merged quad is inset by this much on every side, which keeps the
+        # slightly separated look of the old per-voxel cubes between regions
+        self.inset = (1.0 - scale_factor) / 2
+
+    def build(
+        self,
+        voxels: np.ndarray,
+        palette: np.ndarray,
+        offset: Tuple[int, int, int] = (0, 0, 0),
+        halo: int = 0,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Mesh a voxel grid
+
+        Args:
+            voxels: Integer material grid of shape (X, Y, Z)
+            palette: Float array of shape (num_materials, 3) with RGB per material
+            offset: World position of voxel (0, 0, 0)
+            halo: Number of voxels on every side that only hide faces of the
+                voxels inside them and are not meshed themselves, e.g. the
+                border of neighbouring chunks. ``offset`` is the world
+                position of the first voxel inside the halo.
+
+        Returns:
+            vertices (N, 3) float64, triangles (M, 3) int32 and per-vertex
+            colors (N, 3) float64. Voxel i is centred on coordinate i, as with
+            the previous per-voxel cubes.
+        """
+        vertices, triangles, labels = self.build_labels(voxels, offset, halo)
+        return vertices, triangles, palette[labels]
+
+    def build_labels(
+        self,
+        voxels: np.ndarray,
+        offset: Tuple[int, int, int] = (0, 0, 0),
+        halo: int = 0,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Mesh a voxel grid, returning the voxel value of every vertex
+
+        Same as ``build`` but with an (N,) label array instead of colors, so
+        meshes can be recolored later with a single ``palette[labels]`` gather.
+        Any non-zero integer labels work, faces are only merged between voxels
+        with equal labels.
+        """
+        quads = []
+        materials = []
+        for axis in range(3):
+            for direction in (1, -1):
+                face_quads, face_materials = self._axis_quads(
+                    voxels, axis, direction, halo
+                )
+                quads.append(face_quads)
+                materials.append(face_materials)
+
+        quads = np.concatenate(quads) + np.asarray(offset, dtype=np.float64)
+        materials = np.concatenate(materials)
+
+        vertices = quads.reshape(-1, 3)
+        labels = np.repeat(materials, 4)
+
+        # Two triangles per quad; quads are already wound counter-clockwise
+        # when seen from outside, so the same pattern works for every face
+        base = np.arange(len(materials), dtype=np.int32)[:, None] * 4
+        triangles = (base + np.array([0, 1, 2, 0, 2, 3], dtype=np.int32)).reshape(-1, 3)
+        return vertices, triangles, labels
+
+    def _axis_quads(
+        self, voxels: np.ndarray, axis: int, direction: int, halo: int = 0
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Merged quads for all faces pointing along +axis or -axis"""
+        # In-plane axes chosen so that (u, v, axis) is right-handed
+        u_axis = (axis + 1) % 3
+        v_axis = (axis + 2) % 3
+
+        solid = voxels != Material.AIR
+        padded = np.pad(solid, [(1, 1) if a == axis else (0, 0) for a in range(3)])
+        neighbour = np.take(
+            padded,
+            np.arange(solid.shape[axis]) + 1 + direction,
+            axis=axis,
+        )
+        labels = np.where(solid & ~neighbour, voxels, Material.AIR)
+        if halo:
+            labels = labels[halo:-halo, halo:-halo, halo:-halo]
+
+        # Layout (axis, v, u) so runs are found along the last, contiguous axis
+        labels = labels.transpose(axis, v_axis, u_axis)
+        d_idx, v_idx, u_idx, run_len, material = self._runs(labels)
+
+        # Stack runs with the same slice, start, length and material that sit
+        # in consecutive rows into one rectangle
+        order = np.lexsort((v_idx, material, run_len, u_idx, d_idx))
+        d_idx, v_idx, u_idx, run_len, material = (
+            d_idx[order],
+            v_idx[order],
+            u_idx[order],
+            run_len[order],
+            material[order],
+        )
+        new_rect = np.ones(len(order), dtype=bool)
+        new_rect[1:] = (
+            (d_idx[1:] != d_idx[:-1])
+            | (u_idx[1:] != u_idx[:-1])
+            | (run_len[1:] != run_len[:-1])
+            | (material[1:] != material[:-1])
+            | (v_idx[1:] != v_idx[:-1] + 1)
+        )
+        first = np.flatnonzero(new_rect)
+        rect_height = np.diff(np.append(first, len(order)))
+
+        d_idx, v_idx, u_idx, run_len, material = (
+            d_idx[first],
+            v_idx[first],
+            u_idx[first],
+            run_len[first],
+            material[first],
+        )
+
+        inset = self.inset
+        plane = d_idx + direction * (0.5 - inset)
+        u0 = u_idx - 0.5 + inset
+        u1 = u_idx + run_len - 0.5 - inset
+        v0 = v_idx - 0.5 + inset
+        v1 = v_idx + rect_height - 0.5 - inset
+
+        quads = np.empty((len(first), 4, 3), dtype=np.float64)
+        quads[:, :, axis] = plane[:, None]
+        if direction > 0:
+            quads[:, :, u_axis] = np.stack([u0, u1, u1, u0], axis=1)
+            quads[:, :, v_axis] = np.stack([v0, v0, v1, v1], axis=1)
+        else:
+            # Reverse the winding so the face is visible from the -axis side
+            quads[:, :, u_axis] = np.stack([u0, u0, u1, u1], axis=1)
+            quads[:, :, v_axis] = np.stack([v0, v1, v1, v0], axis=1)
+        return quads, material
+
+    @staticmethod
+    def _runs(labels: np.ndarray):
+        """Find runs of equal non-air labels along the last axis
+
+        Returns the slice, row and start index, run length and material of
+        every run as flat arrays.
+        """
+        # An air column on both ends of every row keeps runs from spanning rows
+        padded = np.pad(labels, [(0, 0), (0, 0), (1, 1)])
+        flat = padded.ravel()
+        change = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+        bounds = np.concatenate(([0], change, [flat.size]))
+        starts = bounds[:-1]
+        lengths = np.diff(bounds)
+        material = flat[starts]
+
+        keep = material != Material.AIR
+        starts, lengths, material = starts[keep], lengths[keep], material[keep]
+
+        d_idx, v_idx, u_idx = np.unravel_index(starts, padded.shape)
+        return d_idx, v_idx, u_idx - 1, lengths, material.astype(np.intp)
@@ -1,94 +1,248 @@
-from typing import List, Dict
+from itertools import product
+from typing import Dict, List, Optional, Set, Tuple
 
 import numpy as np
 import open3d as o3d
 
-from src.renderer.World import World
+from src.renderer.Mesher import Mesher
+from src.renderer.World import Region, World
 from src.renderer.materials import Material
 from src.renderer.objects.Building import Building
+from src.utils.lod import MAX_LOD_LEVEL, downsample_majority
+
+
+# Vertices, triangles and per-vertex colors as returned by Mesher.build
+MeshArrays = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+# Default RGB color per material ID
+DEFAULT_PALETTE = np.array(
+    [
+        [0, 0, 0],  # AIR: Transparent/black
+        [0.8, 0.6, 0.4],  # STONE: Brown
+        [0.8, 0.2, 0.2],  # ROOF: Red
+        [0.4, 0.4, 0.4],  # FLOOR: Gray
+        [0.3, 0.7, 0.9],  # WINDOW: Light blue
+        [0.4, 0.2, 0.1],  # DOOR: Dark brown
+        [0.9, 0.9, 0.9],  # WOOL: White
+        [0.3, 0.3, 0.3],  # STAINED_GLASS
+        [0.8, 0.6, 0.4],  # GLASS: no color of its own, drawn like stone
+    ],
+    dtype=np.float64,
+)
+
+# Color scheme keys for materials that are not named after the material
+SCHEME_MATERIALS = {"wall": Material.STONE}
 
 
 class Renderer:
     """Class for rendering voxel structures using Open3D"""
 
-    def __init__(self, scale_factor: float = 0.95):
-        self.scale_factor = scale_factor
-        self.color_map = {
-            Material.AIR: [0, 0, 0],  # Transparent/black
-            Material.FLOOR: [0.4, 0.4, 0.4],  # Gray
-            Material.STONE: [0.8, 0.6, 0.4],  # Brown
-            Material.ROOF: [0.8, 0.2, 0.2],  # Red
-            Material.WINDOW: [0.3, 0.7, 0.9],  # Light blue
-            Material.DOOR: [0.4, 0.2, 0.1],  # Dark brown
-            Material.WOOL: [0.9, 0.9, 0.9],  # White
-            Material.STAINED_GLASS: [0.3, 0.3, 0.3],  #
-        }
-
-    def _create_cube_mesh(
-        self, center: np.ndarray, color: List[float]
-    ) -> o3d.geometry.TriangleMesh:
-        """Create a single cube mesh with the specified color"""
-        vertices = (
-            np.array(
-                [
-                    [-0.5, -0.5, -0.5],
-                    [0.5, -0.5, -0.5],
-                    [-0.5, 0.5, -0.5],
-                    [0.5, 0.5, -0.5],
-                    [-0.5, -0.5, 0.5],
-                    [0.5, -0.5, 0.5],
-                    [-0.5, 0.5, 0.5],
-                    [0.5, 0.5, 0.5],
-                ]
+    def __init__(
+        self,
+        scale_factor: float = 0.95,
+        chunk_size: int = 32,
+        lod_distance: float = 128.0,
+    ):
+        if chunk_size % 2**MAX_LOD_LEVEL:
+            raise ValueError(
+                f"chunk_size must be a multiple of {2 ** MAX_LOD_LEVEL} for LOD pooling"
             )
-            + center
-        )
+        self.scale_factor = scale_factor
+        self.mesher = Mesher(scale_factor=scale_factor)
+        # World meshes are cached per chunk and level of detail, so edits only
+        # re-mesh what changed
+        self.chunk_size = chunk_size
+        # Chunks closer to the camera than this are meshed at full resolution,
+        # every doubling of the distance halves the resolution
+        self.lod_distance = lod_distance
+        self._chunk_meshes: Dict[Tuple[Tuple[int, int, int], int], MeshArrays] = {}
+        self._occupied_chunks: Set[Tuple[int, int, int]] = set()
+        self._meshed_world: Optional[World] = None
+        # One row of colors per material for every palette, palette 0 is the
+        # default; a voxel's color is palettes[palette, material]
+        self.palettes = DEFAULT_PALETTE[None].copy()
+        # Palette index of every world (x, z) column, None for the default
+        self.palette_map: Optional[np.ndarray] = None
 
-        triangles = np.array(
-            [
-                [0, 2, 1],
-                [1, 2, 3],  # front
-                [1, 3, 5],
-                [5, 3, 7],  # right
-                [5, 7, 4],
-                [4, 7, 6],  # back
-                [4, 6, 0],
-                [0, 6, 2],  # left
-                [2, 6, 3],
-                [3, 6, 7],  # top
-                [0, 1, 4],
-                [4, 1, 5],  # bottom
-            ]
-        )
+    def _get_color_for_material(
+        self, material_id: int, palette: int = 0
+    ) -> List[float]:
+        """Get color for a specific material ID"""
+        return self.palettes[palette, material_id].tolist()
+
+    def _get_palette(self) -> np.ndarray:
+        """All palettes as one (num_palettes * num_materials, 3) color array
+
+        Indexed by ``palette * len(Material) + material``; the first rows are
+        the default palette, so plain material grids can index it directly.
+        """
+        return self.palettes.reshape(-1, 3)
 
+    def _build_mesh(self, voxels: np.ndarray) -> o3d.geometry.TriangleMesh:
+        """Mesh a voxel grid into a single Open3D triangle mesh"""
+        return self._to_o3d_mesh(*self.mesher.build(voxels, self._get_palette()))
+
+    @staticmethod
+    def _to_o3d_mesh(
+        vertices: np.ndarray, triangles: np.ndarray, colors: np.ndarray
+    ) -> o3d.geometry.TriangleMesh:
         mesh = o3d.geometry.TriangleMesh()
         mesh.vertices = o3d.utility.Vector3dVector(vertices)
         mesh.triangles = o3d.utility.Vector3iVector(triangles)
-        mesh.paint_uniform_color(color)
+        mesh.vertex_colors = o3d.utility.Vector3dVector(colors)
         mesh.compute_vertex_normals()
         return mesh
 
-    def _get_color_for_material(self, material_id: int) -> List[float]:
-        """Get color for a specific material ID"""
-        return self.color_map.get(material_id, self.color_map[Material.STONE])
+    def _chunk_origins(
+        self, world: World, regions: Optional[List[Region]] = None
+    ) -> Set[Tuple[int, int, int]]:
+        """Origins of the chunks touching any region, or of all chunks"""
+        c = self.chunk_size
+        counts = [-(-size // c) for size in world.world_size]
+        if regions is None:
+            return {(x * c, y * c, z * c) for x, y, z in product(*map(range, counts))}
 
-    def render_world(self, world: World):
-        """Render the complete world with all objects"""
+        # Neighbouring chunks read changed voxels for face culling, up to one
+        # pooled voxel at the coarsest level of detail
+        margin = 2**MAX_LOD_LEVEL
+        origins = set()
+        for lo, hi in regions:
+            ranges = [
+                range(
+                    max(l - margin, 0) // c, min((h - 1 + margin) // c, count - 1) + 1
+                )
+                for l, h, count in zip(lo, hi, counts)
+            ]
+            origins.update((x * c, y * c, z * c) for x, y, z in product(*ranges))
+        return origins
+
+    def _mesh_chunk(
+        self, world: World, origin: Tuple[int, int, int], level: int = 0
+    ) -> MeshArrays:
+        """Vertices, triangles and per-vertex palette labels of one chunk"""
+        c = self.chunk_size
+        factor = 2**level
+        # Read the chunk plus a border of one (pooled) voxel for face culling
+        lo = [max(o - factor, 0) for o in origin]
+        hi = [min(o + c + factor, size) for o, size in zip(origin, world.world_size)]
+        block = np.asarray(world.voxels[lo[0] : hi[0], lo[1] : hi[1], lo[2] : hi[2]])
+        # Everything outside the world is air
+        block = np.pad(
+            block,
+            [(factor - (o - l), o + c + factor - h) for o, l, h in zip(origin, lo, hi)],
+        )
+        if self.palette_map is not None:
+            # Label voxels with palette and material, so faces of different
+            # districts are never merged and a gather picks their colors
+            columns = self.palette_map[lo[0] : hi[0], lo[2] : hi[2]]
+            columns = np.pad(
+                columns,
+                [
+                    (factor - (o - l), o + c + factor - h)
+                    for o, l, h in zip(origin[::2], lo[::2], hi[::2])
+                ],
+                mode="edge",
+            )
+            block = np.where(
+                block != Material.AIR,
+                block + columns[:, None, :].astype(np.int16) * len(Material),
+                Material.AIR,
+            )
+        # Pools palette and material together, so a block keeps both of its
+        # most common voxel
+        block = downsample_majority(block, factor)
+        vertices, triangles, labels = self.mesher.build_labels(block, halo=1)
+        # Pooled voxel i covers voxels i * factor ... (i + 1) * factor - 1
+        vertices = vertices * factor + (np.asarray(origin) + (factor - 1) / 2)
+        return vertices, triangles, labels
+
+    def _lod_level(
+        self, origin: Tuple[int, int, int], camera_position: Optional[np.ndarray]
+    ) -> int:
+        """Level of detail of a chunk, from its distance to the camera"""
+        if camera_position is None:
+            return 0
+        center = np.asarray(origin) + self.chunk_size / 2
+        distance = np.linalg.norm(center - camera_position)
+        if distance < self.lod_distance:
+            return 0
+        return min(int(np.log2(distance / self.lod_distance)) + 1, MAX_LOD_LEVEL)
+
+    def update_world_mesh(
+        self, world: World, camera_position: Optional[Tuple[float, ...]] = None
+    ) -> MeshArrays:
+        """Mesh a world, re-meshing only chunks modified since the last call
+
+        The first call for a world meshes every chunk; afterwards the world's
+        dirty regions decide which cached chunk meshes are rebuilt. With a
+        camera position, distant chunks are meshed from majority-pooled 2x, 4x
+        or 8x downsampled voxels instead of at full resolution.
+        """
+        if world is self._meshed_world:
+            origins = self._chunk_origins(world, world.pop_dirty_regions())
+        else:
+            self._chunk_meshes.clear()
+            self._occupied_chunks.clear()
+            self._meshed_world = world
+            world.pop_dirty_regions()
+            origins = self._chunk_origins(world)
+
+        c = self.chunk_size
+        for x, y, z in origins:
+            for level in range(MAX_LOD_LEVEL + 1):
+                self._chunk_meshes.pop(((x, y, z), level), None)
+            if np.any(world.voxels[x : x + c, y : y + c, z : z + c]):
+                self._occupied_chunks.add((x, y, z))
+            else:
+                self._occupied_chunks.discard((x, y, z))
+
+        if camera_position is not None:
+            camera_position = np.asarray(camera_position, dtype=np.float64)
         meshes = []
+        for origin in sorted(self._occupied_chunks):
+            key = (origin, self._lod_level(origin, camera_position))
+            if key not in self._chunk_meshes:
+                self._chunk_meshes[key] = self._mesh_chunk(world, origin, key[1])
+            meshes.append(self._chunk_meshes[key])
+
+        if not meshes:
+            return (
+                np.empty((0, 3)),
+                np.empty((0, 3), dtype=np.int32),
+                np.empty((0, 3)),
+            )
+        # Shift every chunk's triangle indices past the vertices before it
+        vertex_offsets = np.cumsum([0] + [len(v) for v, _, _ in meshes[:-1]])
+        return (
+            np.concatenate([v for v, _, _ in meshes]),
+            np.concatenate(
+                [t + offset for (_, t, _), offset in zip(meshes, vertex_offsets)]
+            ).astype(np.int32),
+            # Colors are only looked up now, so recoloring never re-meshes
+            self._get_palette()[np.concatenate([labels for _, _, labels in meshes])],
+        )
+
+    def build_world_mesh(
+        self, world: World, camera_position: Optional[Tuple[float, ...]] = None
+    ) -> Optional[o3d.geometry.TriangleMesh]:
+        """Open3D mesh of the world, or None if the world is empty"""
+        vertices, triangles, colors = self.update_world_mesh(world, camera_position)
+        if not len(triangles):
+            return None
+        return self._to_o3d_mesh(vertices, triangles, colors)
 
-        # Create meshes for all non-air voxels
-        for position in np.argwhere(world.voxels != Material.AIR):
-            material_id = world.voxels[tuple(position)]
-            color = self._get_color_for_material(material_id)
-            mesh = self._create_cube_mesh(position, color)
-            mesh.scale(self.scale_factor, center=mesh.get_center())
-            meshes.append(mesh)
+    def render_world(
+        self, world: World, camera_position: Optional[Tuple[float, ...]] = None
+    ):
+        """Render the complete world with all objects
 
-        if meshes:
-            # Combine all meshes
-            combined_mesh = meshes[0]
-            for mesh in meshes[1:]:
-                combined_mesh += mesh
+        With a camera position the view starts there and chunks far from it
+        are drawn at a lower level of detail.
+        """
+        # Build one mesh containing only the exposed faces
+        combined_mesh = self.build_world_mesh(world, camera_position)
+        if combined_mesh is not None:
 
             # Configure visualization
             vis = o3d.visualization.Visualizer()
@@ -108,18 +262,47 @@ class Renderer:
             # Configure camera
             ctr = vis.get_view_control()
             ctr.set_zoom(0.8)
-            ctr.set_lookat([world.world_size[0] / 2, 0, world.world_size[2] / 2])
+            lookat = np.array([world.world_size[0] / 2, 0, world.world_size[2] / 2])
+            ctr.set_lookat(lookat)
+            if camera_position is not None:
+                ctr.set_front(np.asarray(camera_position) - lookat)
+                ctr.set_up([0, 1, 0])
 
             # Run visualization
             vis.run()
             vis.destroy_window()
 
+    def _scheme_to_palette(
+        self, color_map: Dict[str, List[float]], base: np.ndarray
+    ) -> np.ndarray:
+        palette = base.copy()
+        for name, color in color_map.items():
+            material = SCHEME_MATERIALS.get(name)
+            if material is None and name.upper() in Material.__members__:
+                material = Material[name.upper()]
+            # Unknown keys are ignored, as schemes may carry other settings
+            if material is not None:
+                palette[material] = color
+        return palette
+
     def set_color_scheme(self, color_map: Dict[str, List[float]]):
-        """Update the color scheme for different materials"""
-        # Convert string keys to Material enum values
-        material_colors = {
-            Material.FLOOR: color_map.get("floor", self.color_map[Material.FLOOR]),
-            Material.STONE: color_map.get("wall", self.color_map[Material.STONE]),
-            Material.ROOF: color_map.get("roof", self.color_map[Material.ROOF]),
-        }
-        self.color_map.update(material_colors)
+        """Update the default palette from material names to colors
+
+        Keys are lower case material names ("floor", "roof", ...), "wall"
+        sets the stone color. Other keys are ignored.
+        """
+        self.palettes[0] = self._scheme_to_palette(color_map, self.palettes[0])
+
+    def add_color_scheme(self, color_map: Dict[str, List[float]]) -> int:
+        """Add a palette based on the default one and return its index"""
+        palette = self._scheme_to_palette(color_map, self.palettes[0])
+        self.palettes = np.concatenate((self.palettes, palette[None]))
+        return len(self.palettes) - 1
+
+    def set_palette_map(self, palette_map: Optional[np.ndarray]):
+        """Set the palette index of every world (x, z) column, e.g. per district"""
+        self.palette_map = palette_map
+        # Cached chunk meshes are labelled with the old palette indices
+        self._chunk_meshes.clear()
+        self._occupied_chunks.clear()
+        self._meshed_world = None
@@ -0,0 +1,135 @@
+import math
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import open3d as o3d
+from open3d.visualization import rendering
+
+from src.classes.CameraConfig import CameraConfig
+from src.renderer.Renderer import Renderer
+from src.renderer.World import World
+from src.renderer.objects.Building import Building
+
+
+class SnapshotRenderer(Renderer):
+    """Headless renderer that draws voxel grids to images without a display.
+
+    A single Open3D offscreen renderer is created up front and reused for every
+    snapshot; only the scene geometry is swapped between grids. Cameras are
+    described relative to the grid bounds, so one list of cameras frames worlds
+    and buildings of any size the same way.
+    """
+
+    def __init__(
+        self,
+        width: int = 256,
+        height: int = 256,
+        scale_factor: float = 1.0,
+        background: Tuple[float, float, float] = (0.7, 0.7, 0.7),
+    ):
+        super().__init__(scale_factor=scale_factor)
+        self.width = width
+        self.height = height
+        self.renderer = rendering.OffscreenRenderer(width, height)
+        self.renderer.scene.set_background([*background, 1.0])
+        self.renderer.scene.scene.set_sun_light([-0.5, -1.0, -0.3], [1, 1, 1], 75000)
+        self.renderer.scene.scene.enable_sun_light(True)
+
+        self.material = rendering.MaterialRecord()
+        self.material.shader = "defaultLit"
+
+    def _setup_camera(self, camera: CameraConfig, shape: Tuple[int, int, int]):
+        """Point the camera at the centre of a grid of the given shape"""
+        center, eye = self._get_camera_pose(camera, shape)
+        self.renderer.setup_camera(camera.fov, center, eye, [0, 1, 0])
+
+    @staticmethod
+    def _get_camera_pose(
+        camera: CameraConfig, shape: Tuple[int, int, int]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Look-at point and eye position of a camera framing a grid"""
+        # Voxel i is centred on coordinate i, so the grid spans [-0.5, n - 0.5]
+        center = np.asarray(shape, dtype=np.float64) / 2 - 0.5
+        radius = np.linalg.norm(shape) / 2
+
+        fov = math.radians(camera.fov)
+        distance = radius / math.sin(fov / 2) / camera.zoom
+        azimuth = math.radians(camera.azimuth)
+        elevation = math.radians(camera.elevation)
+        direction = np.array(
+            [
+                math.cos(elevation) * math.sin(azimuth),
+                math.sin(elevation),
+                math.cos(elevation) * math.cos(azimuth),
+            ]
+        )
+        return center, center + direction * distance
+
+    def snapshot(
+        self, voxels: np.ndarray, cameras: Optional[List[CameraConfig]] = None
+    ) -> List[np.ndarray]:
+        """Render a voxel grid from each camera into (H, W, 3) uint8 images"""
+        mesh = self._build_mesh(voxels) if voxels.any() else None
+        return self._render(mesh, voxels.shape, cameras)
+
+    def _render(
+        self,
+        mesh: Optional[o3d.geometry.TriangleMesh],
+        shape: Tuple[int, int, int],
+        cameras: Optional[List[CameraConfig]] = None,
+    ) -> List[np.ndarray]:
+        cameras = cameras or [CameraConfig()]
+        scene = self.renderer.scene
+        scene.clear_geometry()
+        if mesh is not None:
+            scene.add_geometry("voxels", mesh, self.material)
+
+        images = []
+        for camera in cameras:
+            self._setup_camera(camera, shape)
+            images.append(np.asarray(self.renderer.render_to_image()))
+        return images
+
+    def snapshot_world(
+        self,
+        world: World,
+        cameras: Optional[List[CameraConfig]] = None,
+        lod: bool = False,
+    ) -> List[np.ndarray]:
+        """Render the complete world from each camera
+
+        Chunk meshes are cached, so after editing the world only the modified
+        chunks are meshed again. With ``lod`` chunks far from each camera are
+        drawn from downsampled voxels.
+        """
+        if not lod:
+            return self._render(self.build_world_mesh(world), world.world_size, cameras)
+
+        images = []
+        for camera in cameras or [CameraConfig()]:
+            _, eye = self._get_camera_pose(camera, world.world_size)
+            mesh = self.build_world_mesh(world, camera_position=eye)
+            images.extend(self._render(mesh, world.world_size, [camera]))
+        return images
+
+    def snapshot_buildings(
+        self,
+        buildings: Iterable[Union[Building, np.ndarray]],
+        cameras: Optional[List[CameraConfig]] = None,
+    ) -> Iterator[List[np.ndarray]]:
+        """Lazily render a batch of buildings or raw voxel grids"""
+        for building in buildings:
+            voxels = building.voxels if isinstance(building, Building) else building
+            yield self.snapshot(voxels, cameras)
+
+    @staticmethod
+    def save_images(images: List[np.ndarray], path_prefix: Union[str, Path]):
+        """Write images as <path_prefix>_<camera index>.png"""
+        path_prefix = Path(path_prefix)
+        path_prefix.parent.mkdir(parents=True, exist_ok=True)
+        for i, image in enumerate(images):
+            o3d.io.write_image(
+                str(path_prefix.parent / f"{path_prefix.name}_{i}.png"),
+                o3d.geometry.Image(np.ascontiguousarray(image)),
+            )
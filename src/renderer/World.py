@@ -1,18 +1,59 @@
-from typing import Tuple
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
 
 import numpy as np
 
+from src.renderer.ChunkedVoxels import ChunkedVoxels
+from src.renderer.FootprintIndex import Footprint, FootprintIndex
 from src.renderer.objects.Building import Building
 from src.renderer.materials import Material
+from src.utils.encoding import decode_sample, encode_batch
+
+# Axis-aligned box as (min corner, max corner), max exclusive
+Region = Tuple[Tuple[int, int, int], Tuple[int, int, int]]
 
 
 class World:
     """Class to manage multiple objects in a shared world space"""
 
-    def __init__(self, world_size: Tuple[int, int, int] = (50, 20, 50)):
+    def __init__(
+        self,
+        world_size: Tuple[int, int, int] = (50, 20, 50),
+        chunk_size: Optional[int] = None,
+    ):
         self.world_size = world_size
-        self.voxels = np.zeros(world_size, dtype=np.int8)  # Changed to int8
+        if chunk_size is None:
+            self.voxels = np.zeros(world_size, dtype=np.int8)  # Changed to int8
+        else:
+            # Sparse storage: only chunks containing non-air voxels are allocated
+            self.voxels = ChunkedVoxels(world_size, chunk_size=chunk_size)
         self.objects = {}  # Dictionary to store objects and their configurations
+        # 2D (x, z) footprints of all placed objects for fast placement checks
+        self.footprints = FootprintIndex()
+        # Boxes changed since the renderer last meshed the world
+        self.dirty_regions: List[Region] = []
+
+    def mark_dirty(self, position: Tuple[int, int, int], shape: Tuple[int, ...]):
+        """Record that the box of ``shape`` at ``position`` was modified"""
+        x, y, z = (int(n) for n in position)
+        self.dirty_regions.append(
+            ((x, y, z), (x + int(shape[0]), y + int(shape[1]), z + int(shape[2])))
+        )
+
+    def pop_dirty_regions(self) -> List[Region]:
+        """Return and forget all regions modified since the last call"""
+        regions, self.dirty_regions = self.dirty_regions, []
+        return regions
+
+    def is_footprint_free(self, footprint: Footprint) -> bool:
+        """Check whether an (x_min, z_min, x_max, z_max) rectangle overlaps no object
+
+        Objects are registered with the footprint of their whole voxel grid,
+        so this is stricter than the voxel check of ``add_object``: a
+        rectangle reaching under a neighbour's overhang or into the empty
+        corner of its grid counts as taken even if no voxels would collide.
+        """
+        return self.footprints.is_free(footprint)
 
     def add_object(self, name: str, building: Building) -> bool:
         """Add an object to the world if space is available"""
@@ -30,7 +71,8 @@ class World:
             )
             return False
 
-        # Check if space is already occupied
+        # Check if space is already occupied. The voxels are the authority:
+        # they may have been written directly, bypassing the footprint index.
         if np.any(
             self.voxels[
                 x : x + obj_shape[0], y : y + obj_shape[1], z : z + obj_shape[2]
@@ -45,6 +87,8 @@ class World:
             x : x + obj_shape[0], y : y + obj_shape[1], z : z + obj_shape[2]
         ] = building.voxels
         self.objects[name] = building
+        self.footprints.insert(name, (x, z, x + obj_shape[0], z + obj_shape[2]))
+        self.mark_dirty((x, y, z), obj_shape)
         return True
 
     def remove_object(self, name: str):
@@ -60,3 +104,64 @@ class World:
             ] = Material.AIR
 
             del self.objects[name]
+            self.footprints.remove(name)
+            self.mark_dirty((x, y, z), obj_shape)
+
+    def _iter_blocks(
+        self, block_size: int = 32
+    ) -> Iterator[Tuple[Tuple[int, int, int], np.ndarray]]:
+        """Yield offset and voxels of every non-empty block of the world"""
+        if isinstance(self.voxels, ChunkedVoxels):
+            yield from self.voxels.iter_chunks()
+            return
+        for x in range(0, self.world_size[0], block_size):
+            for z in range(0, self.world_size[2], block_size):
+                block = self.voxels[x : x + block_size, :, z : z + block_size]
+                if block.any():
+                    yield (x, 0, z), block
+
+    def save(self, path: Union[str, Path]):
+        """Save the world voxels run-length encoded with 4-bit packed values"""
+        offsets = []
+        blocks = []
+        for offset, block in self._iter_blocks():
+            offsets.append(offset)
+            blocks.append(block)
+        np.savez(
+            path,
+            world_size=np.array(self.world_size, dtype=np.int64),
+            offsets=np.array(offsets, dtype=np.int64).reshape(-1, 3),
+            **encode_batch(blocks),
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path], chunk_size: Optional[int] = None):
+        """Load world voxels written by ``save``
+
+        Only voxels are stored, not the placed objects, so every loaded block
+        is registered as an anonymous footprint for ``is_footprint_free``.
+        """
+        with np.load(path) as data:
+            encoded = {key: data[key] for key in data.files}
+
+        world = cls(tuple(int(n) for n in encoded["world_size"]), chunk_size)
+        for i, (x, y, z) in enumerate(encoded["offsets"]):
+            block = decode_sample(encoded, i)
+            world.voxels[
+                x : x + block.shape[0], y : y + block.shape[1], z : z + block.shape[2]
+            ] = block
+
+            columns = block.any(axis=1)
+            xs = np.flatnonzero(columns.any(axis=1))
+            zs = np.flatnonzero(columns.any(axis=0))
+            if xs.size:
+                world.footprints.insert(
+                    f"__loaded_block_{i}",
+                    (
+                        int(x + xs[0]),
+                        int(z + zs[0]),
+                        int(x + xs[-1] + 1),
+                        int(z + zs[-1] + 1),
+                    ),
+                )
+        return world
@@ -1,49 +1,60 @@
 import numpy as np
+from dataclasses import replace
 from enum import Enum
 from src.renderer.materials import Material
 from src.classes.BuildingConfig import BuildingConfig, Orientation, RoofStyle
 from src.renderer.objects.parts.Roof import Roof
 
 
+def roof_headroom(roof_height, roof_overhang, roof_steepness):
+    """Space above ``roof_height`` a roof may need, for scalars or arrays"""
+    return np.maximum(roof_height * (roof_steepness - 1), 0) + roof_overhang
+
+
 class Building:
     """Class for generating building structures"""
 
     def __init__(self, config: BuildingConfig):
         self.config = config
-        # Create expanded voxel space with padding for overhangs
-        padding = max(self.config.roof_overhang, 20)  # minimum padding of 2 for windows
+        # Create voxel space with only as much padding as the config needs
+        padding = self.get_padding()
         self.padding = padding
         self.voxels = np.zeros(
             (
                 config.length + 1 + (padding * 2),
-                config.height + config.roof_height + 1 + padding,
+                config.height + config.roof_height + 1 + self.get_headroom(),
                 config.width + 1 + (padding * 2),
             ),
             dtype=np.int8,
         )
+        # Parts are only ever generated facing north, the other orientations
+        # are rotated views of the same grid
+        self.config = replace(config, orientation=Orientation.NORTH)
         self.generate()
-        self.trim_to_size()
-
-    def get_used_bounds(self):
-        """Calculate the actual used space bounds"""
-        # Find non-zero elements
-        non_zero = np.nonzero(self.voxels)
-        if len(non_zero[0]) == 0:  # If array is empty
-            return (0, 0), (0, 0), (0, 0)
-
-        # Get min and max for each dimension
-        x_min, x_max = np.min(non_zero[0]), np.max(non_zero[0])
-        y_min, y_max = np.min(non_zero[1]), np.max(non_zero[1])
-        z_min, z_max = np.min(non_zero[2]), np.max(non_zero[2])
-
-        return (x_min, x_max), (y_min, y_max), (z_min, z_max)
-
-    def trim_to_size(self):
-        """Trim the voxel space to the actually used space"""
-        (x_min, x_max), (y_min, y_max), (z_min, z_max) = self.get_used_bounds()
-        self.voxels = self.voxels[
-            x_min : x_max + 1, y_min : y_max + 1, z_min : z_max + 1
-        ]
+        self.config = config
+        self.canonical_voxels = self.voxels
+        self._rotations = {Orientation.NORTH: self.canonical_voxels}
+        self.voxels = self.get_rotated_voxels(config.orientation)
+
+    def get_padding(self) -> int:
+        """Horizontal space needed around the walls for overhanging parts
+
+        One extra voxel is kept so slices such as ``-p + 1`` never become 0.
+        """
+        return max(self.config.roof_overhang, 1) + 1
+
+    def get_headroom(self) -> int:
+        """Vertical space needed above ``roof_height`` for steep roofs
+
+        Every one of the ``roof_height`` roof layers rises at most
+        ``roof_steepness`` voxels, and each voxel of overhang adds one eave
+        layer. The grid is allocated at its final size and never trimmed.
+        """
+        return roof_headroom(
+            self.config.roof_height,
+            self.config.roof_overhang,
+            self.config.roof_steepness,
+        )
 
     def create_floor(self):
         # Offset by padding
@@ -61,31 +72,11 @@ class Building:
 
     def create_door(self):
         p = self.padding
-        # Create door based on orientation
-        if self.config.orientation == Orientation.NORTH:
-            door_pos = self.config.length // 2 + p
-            self.voxels[
-                door_pos - 1 : door_pos + 1, 1 : self.config.door_height + 1, p : p + 1
-            ] = Material.DOOR
-        elif self.config.orientation == Orientation.SOUTH:
-            door_pos = self.config.length // 2 + p
-            self.voxels[
-                door_pos - 1 : door_pos + 1,
-                1 : self.config.door_height + 1,
-                -p - 1 : -p,
-            ] = Material.DOOR
-        elif self.config.orientation == Orientation.EAST:
-            door_pos = self.config.width // 2 + p
-            self.voxels[
-                -p - 1 : -p,
-                1 : self.config.door_height + 1,
-                door_pos - 1 : door_pos + 1,
-            ] = Material.DOOR
-        elif self.config.orientation == Orientation.WEST:
-            door_pos = self.config.width // 2 + p
-            self.voxels[
-                p : p + 1, 1 : self.config.door_height + 1, door_pos - 1 : door_pos + 1
-            ] = Material.DOOR
+        # Door on the front (north) wall, rotated views take care of the rest
+        door_pos = self.config.length // 2 + p
+        self.voxels[
+            door_pos - 1 : door_pos + 1, 1 : self.config.door_height + 1, p : p + 1
+        ] = Material.DOOR
 
     def create_windows(self):
         p = self.padding
@@ -159,31 +150,44 @@ class Building:
         self.create_door()
         self.create_roof()
 
-    def rotate(self, new_orientation: Orientation):
-        """Rotate the building to a new orientation"""
-        # Store current state
-        current_voxels = self.voxels.copy()
-
-        # If rotating 90° or 270°, swap length and width
-        if abs(new_orientation.value - self.config.orientation.value) % 2 == 1:
-            self.voxels = np.zeros(
-                (
-                    self.config.width + 1 + (self.padding * 2),
-                    self.config.height + self.config.roof_height + 1 + self.padding,
-                    self.config.length + 1 + (self.padding * 2),
-                ),
-                dtype=np.int8,
-            )
-            # Swap length and width in config
-            self.config.length, self.config.width = (
-                self.config.width,
-                self.config.length,
+    def get_rotated_voxels(self, orientation: Orientation) -> np.ndarray:
+        """View of the north-facing grid rotated to an orientation
+
+        The front wall starts on the low z side and is turned clockwise (seen
+        from above) towards high x, high z and low x. Views are cached, so
+        switching orientation never copies the grid.
+        """
+        if orientation not in self._rotations:
+            self._rotations[orientation] = np.rot90(
+                self.canonical_voxels, k=orientation.value, axes=(0, 2)
             )
+        return self._rotations[orientation]
 
-        # Perform rotation
-        rotations = (new_orientation.value - self.config.orientation.value) % 4
-        self.voxels = np.rot90(current_voxels, k=rotations, axes=(0, 2))
+    def rotate(self, new_orientation: Orientation):
+        """Rotate the building to a new orientation
 
-        # Update orientation
+        ``length`` and ``width`` keep describing the north-facing building, so
+        for EAST and WEST the grid is ``width`` long along x.
+        """
+        self.voxels = self.get_rotated_voxels(new_orientation)
         self.config.orientation = new_orientation
-        self.trim_to_size()
+
+    def __getstate__(self):
+        # voxels and the cached rotations are views of canonical_voxels, but
+        # pickle would write each of them as a separate copy of the grid
+        state = self.__dict__.copy()
+        state.pop("voxels", None)
+        state.pop("_rotations", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._rotations = {Orientation.NORTH: self.canonical_voxels}
+        self.voxels = self.get_rotated_voxels(self.config.orientation)
+
+    def freeze(self):
+        """Make the voxels read-only, e.g. before sharing the building"""
+        self.canonical_voxels.setflags(write=False)
+        # Views taken before freezing would stay writeable
+        self._rotations = {Orientation.NORTH: self.canonical_voxels}
+        self.voxels = self.get_rotated_voxels(self.config.orientation)
@@ -0,0 +1,173 @@
+from dataclasses import fields
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.classes.BuildingConfig import BuildingConfig
+from src.renderer.materials import Material
+from src.renderer.objects.Building import Building, roof_headroom
+
+
+class BuildingBatch:
+    """Generate many plain buildings into one (N, X, Y, Z) int8 tensor.
+
+    Configs are turned into per-field columns and floor, walls, windows and
+    door of all buildings are written with broadcast masks over the batch axis,
+    instead of creating one ``Building`` object per config. The roof is still
+    added per building by ``Roof`` on a view into the tensor.
+
+    Every building is generated facing north with its walls starting at
+    ``padding`` on x and z. Its own grid, as ``Building`` would allocate it,
+    starts at ``offsets[i]`` on both axes, so ``get_voxels(i)`` returns exactly
+    what ``Building(configs[i]).voxels`` would.
+    """
+
+    def __init__(self, configs: Sequence[BuildingConfig]):
+        if any(type(config) is not BuildingConfig for config in configs):
+            # Subclass configs add parts (towers, awnings, ...) the kernel lacks
+            raise TypeError("BuildingBatch only supports plain BuildingConfig")
+        self.configs = list(configs)
+        self.columns: Dict[str, np.ndarray] = {
+            field.name: np.array([getattr(config, field.name) for config in configs])
+            for field in fields(BuildingConfig)
+            if field.type is int
+        }
+        # Per-building padding and grid size, as Building would allocate them
+        paddings = np.maximum(self.columns["roof_overhang"], 1) + 1
+        self.padding = int(paddings.max(initial=0))
+        self.offsets = self.padding - paddings
+        self.sizes = np.stack(
+            (
+                self.columns["length"] + 1 + 2 * paddings,
+                self.columns["height"]
+                + self.columns["roof_height"]
+                + 1
+                + roof_headroom(
+                    self.columns["roof_height"],
+                    self.columns["roof_overhang"],
+                    self.columns["roof_steepness"],
+                ),
+                self.columns["width"] + 1 + 2 * paddings,
+            ),
+            axis=1,
+        )
+        ends = self.sizes + np.stack(
+            (self.offsets, np.zeros_like(self.offsets), self.offsets), axis=1
+        )
+        self.shape: Tuple[int, int, int, int] = (
+            len(self.configs),
+            *(int(n) for n in ends.max(axis=0, initial=0)),
+        )
+        self.voxels: Optional[np.ndarray] = None
+
+    def _column(self, name: str) -> np.ndarray:
+        return self._column_of(self.columns[name])
+
+    @staticmethod
+    def _column_of(values: np.ndarray) -> np.ndarray:
+        # Broadcastable against (N, X, Y, Z)
+        return values[:, None, None, None]
+
+    def generate(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Write all buildings into ``out`` (allocated when not given)"""
+        if out is None:
+            out = np.zeros(self.shape, dtype=np.int8)
+        elif out.shape != self.shape or out.dtype != np.int8:
+            raise ValueError(f"Expected an int8 array of shape {self.shape}")
+        else:
+            out[...] = Material.AIR
+
+        p = self.padding
+        n, size_x, _, size_z = self.shape
+        length = self._column("length")
+        width = self._column("width")
+        height = self._column("height")
+        window_size = self._column("window_size")
+        window_height = self._column("window_height")
+
+        # Everything but the roof lies below the wall tops and window rows
+        window_top = (window_height + window_size).max(initial=0)
+        top = int(max(height.max(initial=0), window_top)) + 1
+        shell = out[:, :, :top, :]
+        x = np.arange(size_x)[None, :, None, None]
+        y = np.arange(top)[None, None, :, None]
+        z = np.arange(size_z)[None, None, None, :]
+
+        inside_x = (x >= p) & (x <= p + length)
+        inside_z = (z >= p) & (z <= p + width)
+        front, back = z == p, z == p + width
+        left, right = x == p, x == p + length
+
+        # Floor
+        np.copyto(shell, np.int8(Material.FLOOR), where=(y == 0) & inside_x & inside_z)
+
+        # Front/back and side walls
+        wall_rows = (y >= 1) & (y <= height)
+        walls = (inside_x & (front | back)) | (inside_z & (left | right))
+        np.copyto(shell, np.int8(Material.STONE), where=walls & wall_rows)
+
+        # Windows every 6 voxels along each wall, loop over the window index only
+        window_rows = (y >= window_height) & (y < window_height + window_size)
+        window_rows |= (height >= 7) & (y == height - 2)
+        window_x = np.zeros((n, size_x, 1, 1), dtype=bool)
+        window_z = np.zeros((n, 1, 1, size_z), dtype=bool)
+        for pos in range(3, max(size_x, size_z), 6):
+            window_x |= (
+                (pos < length - 3) & (x >= pos + p) & (x < pos + p + window_size)
+            )
+            window_z |= (pos < width - 3) & (z >= pos + p) & (z < pos + p + window_size)
+        windows = (window_x & (front | back)) | (window_z & (left | right))
+        # Building's own grid would cut off windows running past its edge
+        offsets = self._column_of(self.offsets)
+        windows &= (x < offsets + self._column_of(self.sizes[:, 0])) & (
+            z < offsets + self._column_of(self.sizes[:, 2])
+        )
+        np.copyto(shell, np.int8(Material.WINDOW), where=windows & window_rows)
+
+        # Door in the middle of the front wall
+        door_x = x - (length // 2 + p)
+        door_rows = (y >= 1) & (y <= self._column("door_height"))
+        door = (door_x >= -1) & (door_x < 1) & front
+        np.copyto(shell, np.int8(Material.DOOR), where=door & door_rows)
+
+        for i, config in enumerate(self.configs):
+            self._create_roof(out, i, config)
+        self.voxels = out
+        return out
+
+    def _grid(self, index: int) -> Tuple[slice, slice, slice]:
+        """Slices of building ``index``'s own grid within the batch tensor"""
+        offset = self.offsets[index]
+        size_x, size_y, size_z = self.sizes[index]
+        return (
+            slice(offset, offset + size_x),
+            slice(0, size_y),
+            slice(offset, offset + size_z),
+        )
+
+    def _create_roof(self, out: np.ndarray, index: int, config: BuildingConfig):
+        # Roof works on a building, so hand it one viewing this building's grid
+        building = Building.__new__(Building)
+        building.config = config
+        building.padding = self.padding - int(self.offsets[index])
+        building.voxels = out[(index, *self._grid(index))]
+        building.create_roof()
+
+    def get_voxels(self, index: int) -> np.ndarray:
+        """Oriented copy of one building's grid like ``Building.voxels``
+
+        A copy, as a view would keep the whole batch tensor alive for as long
+        as the sample is buffered.
+        """
+        if self.voxels is None:
+            self.generate()
+        voxels = self.voxels[(index, *self._grid(index))]
+        k = self.configs[index].orientation.value
+        # Always copy: ascontiguousarray would return a building spanning the
+        # whole tensor as a view
+        return np.rot90(voxels, k=k, axes=(0, 2)).copy()
+
+    def iter_voxels(self) -> Iterator[np.ndarray]:
+        """Oriented copies of all buildings in order"""
+        for index in range(len(self.configs)):
+            yield self.get_voxels(index)
@@ -0,0 +1,94 @@
+import copy
+from collections import OrderedDict
+from dataclasses import fields
+from enum import Enum
+from typing import Callable, Dict, Hashable, Tuple
+
+import numpy as np
+
+from src.classes.BuildingConfig import BuildingConfig
+from src.renderer.objects.Building import Building
+
+
+class BuildingCache:
+    """LRU cache of generated buildings keyed on their config.
+
+    Configs that only differ in ``position`` or ``orientation`` share one
+    north-facing voxel grid, so the first building generated for a config
+    becomes a template and later requests get a shallow copy holding a rotated,
+    read-only view of it. Templates are evicted
+    least recently used first once their voxels exceed ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.templates: "OrderedDict[Hashable, Building]" = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def get_key(config: BuildingConfig) -> Tuple:
+        """Canonical, hashable form of a config without position and orientation"""
+        values = []
+        for field in fields(config):
+            if field.name in ("position", "orientation"):
+                continue
+            value = getattr(config, field.name)
+            if isinstance(value, Enum):
+                value = value.value
+            elif isinstance(value, np.generic):
+                value = value.item()
+            values.append((field.name, value))
+        return (type(config).__name__, tuple(values))
+
+    def get(
+        self, config: BuildingConfig, factory: Callable[[BuildingConfig], Building]
+    ) -> Building:
+        """Return a building for the config, generating it with factory on a miss"""
+        key = self.get_key(config)
+        template = self.templates.get(key)
+        if template is None:
+            self.misses += 1
+            template = factory(copy.copy(config))
+            template.freeze()
+            self._insert(key, template)
+        else:
+            self.hits += 1
+            self.templates.move_to_end(key)
+
+        # Hand out copies so callers can never modify a template in place
+        building = copy.copy(template)
+        # Subclasses keep extra references to the config (church_config, ...)
+        for name, value in vars(template).items():
+            if value is template.config:
+                setattr(building, name, config)
+        building.voxels = building.get_rotated_voxels(config.orientation)
+        return building
+
+    def _insert(self, key: Hashable, template: Building):
+        self.templates[key] = template
+        self.nbytes += template.canonical_voxels.nbytes
+        while self.nbytes > self.max_bytes and len(self.templates) > 1:
+            _, evicted = self.templates.popitem(last=False)
+            self.nbytes -= evicted.canonical_voxels.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        self.templates.clear()
+        self.nbytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size of the cache"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "templates": len(self.templates),
+            "bytes": self.nbytes,
+        }
+
+
+# Shared per process, so every worker of a process pool keeps its own templates
+BUILDING_CACHE = BuildingCache()
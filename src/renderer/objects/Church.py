@@ -1,4 +1,6 @@
-from src.classes.BuildingConfig import ChurchConfig, Orientation
+from itertools import groupby
+
+from src.classes.BuildingConfig import ChurchConfig
 from src.renderer.materials import Material
 from src.renderer.objects.Building import Building
 
@@ -10,6 +12,21 @@ class Church(Building):
         self.church_config = config
         super().__init__(config)
 
+    def get_padding(self) -> int:
+        padding = super().get_padding()
+        if self.church_config.has_bell_tower:
+            # The bell tower stands outside one of the walls
+            padding = max(padding, self.church_config.bell_tower_width + 1)
+        return padding
+
+    def get_headroom(self) -> int:
+        roof_line = self.config.height + self.config.roof_height + 1
+        # The steeple sits on the roof line, the bell tower on the ground;
+        # both are topped by a cross reaching a few voxels higher
+        steeple_headroom = self.church_config.steeple_height + 3
+        bell_tower_headroom = self.church_config.bell_tower_height + 5 - roof_line
+        return max(super().get_headroom(), steeple_headroom, bell_tower_headroom)
+
     def create_bell_tower(self):
         p = self.padding
         base_height = self.config.height
@@ -17,61 +34,29 @@ class Church(Building):
 
         # add tower base
 
-        # Determine tower position based on orientation and preference
-        if self.config.orientation in [Orientation.NORTH, Orientation.SOUTH]:
-            if self.church_config.bell_tower_position == "left":
-                tower_x = p - tower_width  # Place tower outside the left wall
-            else:
-                tower_x = (
-                    p + self.config.length + 1
-                )  # Place tower outside the right wall
-            tower_z = p + (self.config.width // 3)  # Place along the length
-            tower_depth = tower_width
-        else:  # EAST or WEST
-            if self.church_config.bell_tower_position == "left":
-                tower_z = p - tower_width  # Place tower outside the left wall
-            else:
-                tower_z = (
-                    p + self.config.width + 1
-                )  # Place tower outside the right wall
-            tower_x = p + (self.config.length // 3)  # Place along the length
-            tower_depth = tower_width
+        # Determine tower position based on preference
+        if self.church_config.bell_tower_position == "left":
+            tower_x = p - tower_width  # Place tower outside the left wall
+        else:
+            tower_x = p + self.config.length + 1  # Place tower outside the right wall
+        tower_z = p + (self.config.width // 3)  # Place along the length
+        tower_depth = tower_width
+
+        # Work on the tower's own sub-volume from here on
+        tower = self.voxels[
+            tower_x : tower_x + tower_width, :, tower_z : tower_z + tower_depth
+        ]
 
         # Create tower base
-        self.voxels[
-            tower_x : tower_x + tower_width,
-            1 : self.church_config.bell_tower_height,
-            tower_z : tower_z + tower_depth,
-        ] = Material.STONE
+        tower[:, 1 : self.church_config.bell_tower_height, :] = Material.STONE
 
-        # Add windows to the tower
-        window_levels = range(3, self.church_config.bell_tower_height - 3, 3)
-        for y in window_levels:
-            # Add windows on all four sides of the tower
-            # Front
-            self.voxels[
-                tower_x + 1 : tower_x + tower_width - 1,
-                y : y + 2,
-                tower_z : tower_z + 1,
-            ] = Material.STAINED_GLASS
-            # Back
-            self.voxels[
-                tower_x + 1 : tower_x + tower_width - 1,
-                y : y + 2,
-                tower_z + tower_depth - 1 : tower_z + tower_depth,
-            ] = Material.STAINED_GLASS
-            # Left
-            self.voxels[
-                tower_x : tower_x + 1,
-                y : y + 2,
-                tower_z + 1 : tower_z + tower_depth - 1,
-            ] = Material.STAINED_GLASS
-            # Right
-            self.voxels[
-                tower_x + tower_width - 1 : tower_x + tower_width,
-                y : y + 2,
-                tower_z + 1 : tower_z + tower_depth - 1,
-            ] = Material.STAINED_GLASS
+        # Add two voxel high windows on all four sides every third level
+        last_level = self.church_config.bell_tower_height - 3
+        for rows in (slice(3, last_level, 3), slice(4, last_level + 1, 3)):
+            tower[1:-1, rows, 0] = Material.STAINED_GLASS  # Front
+            tower[1:-1, rows, -1] = Material.STAINED_GLASS  # Back
+            tower[0, rows, 1:-1] = Material.STAINED_GLASS  # Left
+            tower[-1, rows, 1:-1] = Material.STAINED_GLASS  # Right
 
         # Create tower roof (pyramid style)
         tower_top = self.church_config.bell_tower_height
@@ -116,26 +101,24 @@ class Church(Building):
         # Create wider steeple base (4x4)
         steeple_base_width = 4
         steeple_base_height = 3
-        for y in range(base_height, base_height + steeple_base_height):
-            offset = (steeple_base_width) // 2
-            self.voxels[
-                center_x - offset : center_x + offset,
-                y : y + 1,
-                center_z - offset : center_z + offset,
-            ] = Material.STONE
+        offset = (steeple_base_width) // 2
+        self.voxels[
+            center_x - offset : center_x + offset,
+            base_height : base_height + steeple_base_height,
+            center_z - offset : center_z + offset,
+        ] = Material.STONE
 
-        # Create tapering spire
+        # Create tapering spire, writing each run of equally wide layers at once
+        spire_start = base_height + steeple_base_height
         spire_height = self.church_config.steeple_height - steeple_base_height
-        for y in range(
-            base_height + steeple_base_height,
-            base_height + self.church_config.steeple_height,
-        ):
-            progress = (y - (base_height + steeple_base_height)) / spire_height
-            width = max(1, int(3 * (1 - progress)))
+        layers = range(spire_height)
+        widths = [max(1, int(3 * (1 - layer / spire_height))) for layer in layers]
+        for width, run in groupby(layers, key=lambda layer: widths[layer]):
+            run = list(run)
             offset = width // 2
             self.voxels[
                 center_x - offset : center_x + width - offset,
-                y : y + 1,
+                spire_start + run[0] : spire_start + run[-1] + 1,
                 center_z - offset : center_z + width - offset,
             ] = Material.STONE
 
@@ -150,35 +133,29 @@ class Church(Building):
 
     def create_stained_glass(self):
         p = self.padding
-        # Replace regular windows with stained glass and make them taller
-        window_mask = self.voxels == Material.WINDOW
-        self.voxels[window_mask] = Material.STAINED_GLASS
+        # Replace regular windows with stained glass and make them taller. Only
+        # the four wall faces and rows create_windows writes are searched.
+        rows = slice(
+            self.config.window_height,
+            max(
+                self.config.height,
+                self.config.window_height + self.config.window_size,
+            ),
+        )
+        for face in (
+            self.voxels[p, rows, :],
+            self.voxels[-p - 1, rows, :],
+            self.voxels[:, rows, p],
+            self.voxels[:, rows, -p - 1],
+        ):
+            face[face == Material.WINDOW] = Material.STAINED_GLASS
 
         # Create larger stained glass window at the front
-        if self.config.orientation == Orientation.NORTH:
-            self.voxels[
-                p + self.config.length // 2 - 1 : p + self.config.length // 2 + 2,
-                2 : self.config.height - 1,
-                p : p + 1,
-            ] = Material.STAINED_GLASS
-        elif self.config.orientation == Orientation.SOUTH:
-            self.voxels[
-                p + self.config.length // 2 - 1 : p + self.config.length // 2 + 2,
-                2 : self.config.height - 1,
-                -p - 1 : -p,
-            ] = Material.STAINED_GLASS
-        elif self.config.orientation == Orientation.EAST:
-            self.voxels[
-                -p - 1 : -p,
-                2 : self.config.height - 1,
-                p + self.config.width // 2 - 1 : p + self.config.width // 2 + 2,
-            ] = Material.STAINED_GLASS
-        elif self.config.orientation == Orientation.WEST:
-            self.voxels[
-                p : p + 1,
-                2 : self.config.height - 1,
-                p + self.config.width // 2 - 1 : p + self.config.width // 2 + 2,
-            ] = Material.STAINED_GLASS
+        self.voxels[
+            p + self.config.length // 2 - 1 : p + self.config.length // 2 + 2,
+            2 : self.config.height - 1,
+            p : p + 1,
+        ] = Material.STAINED_GLASS
 
     def generate(self):
         super().generate()
@@ -1,4 +1,4 @@
-from src.classes.BuildingConfig import ShopConfig, Orientation
+from src.classes.BuildingConfig import ShopConfig
 from src.renderer.materials import Material
 from src.renderer.objects.Building import Building
 
@@ -12,37 +12,15 @@ class Shop(Building):
 
     def create_display_window(self):
         p = self.padding
-        # Create larger window at front based on orientation
-        if self.config.orientation == Orientation.NORTH:
-            self.voxels[p + 2 : -p - 2, 1:4, p : p + 1] = Material.WINDOW
-        elif self.config.orientation == Orientation.SOUTH:
-            self.voxels[p + 2 : -p - 2, 1:4, -p - 1 : -p] = Material.WINDOW
-        elif self.config.orientation == Orientation.EAST:
-            self.voxels[-p - 1 : -p, 1:4, p + 2 : -p - 2] = Material.WINDOW
-        elif self.config.orientation == Orientation.WEST:
-            self.voxels[p : p + 1, 1:4, p + 2 : -p - 2] = Material.WINDOW
+        # Create larger window at the front
+        self.voxels[p + 2 : -p - 2, 1:4, p : p + 1] = Material.WINDOW
 
     def create_awning(self):
         p = self.padding
         height = 4  # Above display window
 
-        # Create awning based on orientation
-        if self.config.orientation == Orientation.NORTH:
-            self.voxels[p + 1 : -p - 1, height : height + 1, p - 1 : p + 2] = (
-                Material.WOOL
-            )
-        elif self.config.orientation == Orientation.SOUTH:
-            self.voxels[p + 1 : -p - 1, height : height + 1, -p - 2 : -p + 1] = (
-                Material.WOOL
-            )
-        elif self.config.orientation == Orientation.EAST:
-            self.voxels[-p - 2 : -p + 1, height : height + 1, p + 1 : -p - 1] = (
-                Material.WOOL
-            )
-        elif self.config.orientation == Orientation.WEST:
-            self.voxels[p - 1 : p + 2, height : height + 1, p + 1 : -p - 1] = (
-                Material.WOOL
-            )
+        # Create awning over the front wall
+        self.voxels[p + 1 : -p - 1, height : height + 1, p - 1 : p + 2] = Material.WOOL
 
     def generate(self):
         super().generate()
@@ -1,3 +1,5 @@
+import numpy as np
+
 from src.classes.BuildingConfig import TowerConfig
 from src.renderer.materials import Material
 from src.renderer.objects.Building import Building
@@ -13,22 +15,26 @@ class Tower(Building):
     def create_battlements(self):
         p = self.padding
         height = self.config.height
+        stop = self.voxels.shape[0] - p
 
-        # Create merlon pattern (raised sections)
-        for i in range(p, self.voxels.shape[0] - p, 2):
-            self.voxels[i : i + 1, height : height + 2, p:-p] = Material.STONE
-            self.voxels[p:-p, height : height + 2, i : i + 1] = Material.STONE
+        # Create merlon pattern (raised sections) on every second row and column
+        self.voxels[p:stop:2, height : height + 2, p:-p] = Material.STONE
+        self.voxels[p:-p, height : height + 2, p:stop:2] = Material.STONE
 
     def create_floor_markers(self):
         p = self.padding
-        for floor in range(1, self.tower_config.num_floors + 1):
-            height = (self.config.height // self.tower_config.num_floors) * floor
-            self.voxels[p:-p, height : height + 1, p:-p] = Material.FLOOR
+        floors = np.arange(1, self.tower_config.num_floors + 1)
+        heights = (self.config.height // self.tower_config.num_floors) * floors
+        self.voxels[p:-p, heights, p:-p] = Material.FLOOR
+
+    def remove_roof(self):
+        """Clear the roof, only searching the rows above the walls it sits on"""
+        roof = self.voxels[:, self.config.height + 1 :, :]
+        roof[roof == Material.ROOF] = Material.AIR
 
     def generate(self):
         super().generate()
         if self.tower_config.has_battlements:
-            # remove roof
-            self.voxels[self.voxels == Material.ROOF] = Material.AIR
+            self.remove_roof()
             self.create_battlements()
         self.create_floor_markers()
@@ -1,5 +1,8 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from enum import Enum
 
 from src.renderer.Renderer import Renderer
@@ -13,9 +16,15 @@ from src.classes.BuildingConfig import (
     ShopConfig,
 )
 from src.renderer.objects.Building import Building
+from src.renderer.objects.BuildingCache import BUILDING_CACHE
 from src.renderer.objects.Church import Church
 from src.renderer.objects.Shop import Shop
 from src.renderer.objects.Tower import Tower
+from src.utils.seeding import spawn_rng
+
+# Stream keys for the random generators derived from the city seed
+DISTRICT_STREAM = 0
+BUILDING_STREAM = 1
 
 
 class DistrictType(Enum):
@@ -26,22 +35,51 @@ class DistrictType(Enum):
     MIXED = "mixed"
 
 
+def create_building(config: Any) -> Building:
+    """Create appropriate building type based on config
+
+    Kept at module level so it can be shipped to worker processes. Buildings
+    with the same config apart from position share cached voxels.
+    """
+    return BUILDING_CACHE.get(config, _construct_building)
+
+
+def _construct_building(config: Any) -> Building:
+    if isinstance(config, TowerConfig):
+        return Tower(config)
+    elif isinstance(config, ChurchConfig):
+        return Church(config)
+    elif isinstance(config, ShopConfig):
+        return Shop(config)
+    else:
+        return Building(config)
+
+
 class CityPlanner:
-    def __init__(self, world_size: Tuple[int, int, int]):
-        self.world = World(world_size=world_size)
+    def __init__(
+        self,
+        world_size: Tuple[int, int, int],
+        chunk_size: Optional[int] = None,
+        seed: int = 42,
+    ):
+        self.world = World(world_size=world_size, chunk_size=chunk_size)
         self.world_size = world_size
+        self.seed = seed
         self.districts: Dict[DistrictType, List[Tuple[int, int, int, int]]] = {}
         self.building_count = 0
 
-    def create_districts(self, district_size: int = 50):
+    def create_districts(
+        self, district_size: int = 50, rng: Optional[np.random.Generator] = None
+    ):
         """Divide the city into districts"""
+        rng = rng or spawn_rng(self.seed, DISTRICT_STREAM)
         x_districts = self.world_size[0] // district_size
         z_districts = self.world_size[2] // district_size
 
         # Create district map
         for x in range(x_districts):
             for z in range(z_districts):
-                district_type = np.random.choice(
+                district_type = rng.choice(
                     list(DistrictType), p=[0.4, 0.3, 0.1, 0.1, 0.1]
                 )
                 district_bounds = (
@@ -63,7 +101,10 @@ class CityPlanner:
         return DistrictType.MIXED
 
     def generate_building_config(
-        self, district_type: DistrictType, pos: Tuple[int, int, int]
+        self,
+        district_type: DistrictType,
+        pos: Tuple[int, int, int],
+        rng: np.random.Generator,
     ) -> Any:
         """Generate appropriate building config based on district type"""
         base_ranges = {
@@ -78,76 +119,178 @@ class CityPlanner:
 
         if district_type == DistrictType.MEDIEVAL:
             return TowerConfig(
-                width=np.random.randint(5, 8),
-                length=np.random.randint(5, 8),
-                height=np.random.randint(12, 20),
-                num_floors=np.random.randint(3, 5),
-                has_battlements=np.random.choice([True, False]),
+                width=rng.integers(5, 8),
+                length=rng.integers(5, 8),
+                height=rng.integers(12, 20),
+                num_floors=rng.integers(3, 5),
+                has_battlements=rng.choice([True, False]),
                 position=pos,
-                orientation=np.random.choice(list(Orientation)),
+                orientation=rng.choice(list(Orientation)),
                 roof_style=RoofStyle.PYRAMID,
             )
 
         elif district_type == DistrictType.RELIGIOUS:
             return ChurchConfig(
-                width=np.random.randint(8, 15),
-                length=np.random.randint(12, 20),
-                height=np.random.randint(8, 12),
+                width=rng.integers(8, 15),
+                length=rng.integers(12, 20),
+                height=rng.integers(8, 12),
                 has_steeple=True,
-                steeple_height=np.random.randint(6, 10),
+                steeple_height=rng.integers(6, 10),
                 position=pos,
-                orientation=np.random.choice(list(Orientation)),
+                orientation=rng.choice(list(Orientation)),
                 roof_style=RoofStyle.PITCHED,
             )
 
         elif district_type == DistrictType.COMMERCIAL:
             return ShopConfig(
-                width=np.random.randint(6, 10),
-                length=np.random.randint(8, 12),
-                height=np.random.randint(4, 7),
+                width=rng.integers(6, 10),
+                length=rng.integers(8, 12),
+                height=rng.integers(4, 7),
                 has_display_window=True,
-                shop_type=np.random.choice(
-                    ["bakery", "blacksmith", "tailor", "general"]
-                ),
+                shop_type=rng.choice(["bakery", "blacksmith", "tailor", "general"]),
                 position=pos,
-                orientation=np.random.choice(list(Orientation)),
-                roof_style=np.random.choice([RoofStyle.FLAT, RoofStyle.PITCHED]),
+                orientation=rng.choice(list(Orientation)),
+                roof_style=rng.choice([RoofStyle.FLAT, RoofStyle.PITCHED]),
             )
 
         else:  # RESIDENTIAL or MIXED
             return BuildingConfig(
-                width=np.random.randint(*base_ranges["width"]),
-                length=np.random.randint(*base_ranges["length"]),
-                height=np.random.randint(*base_ranges["height"]),
-                roof_height=np.random.randint(*base_ranges["roof_height"]),
-                door_height=np.random.randint(*base_ranges["door_height"]),
-                window_height=np.random.randint(*base_ranges["window_height"]),
-                window_size=np.random.randint(*base_ranges["window_size"]),
+                width=rng.integers(*base_ranges["width"]),
+                length=rng.integers(*base_ranges["length"]),
+                height=rng.integers(*base_ranges["height"]),
+                roof_height=rng.integers(*base_ranges["roof_height"]),
+                door_height=rng.integers(*base_ranges["door_height"]),
+                window_height=rng.integers(*base_ranges["window_height"]),
+                window_size=rng.integers(*base_ranges["window_size"]),
                 position=pos,
-                orientation=np.random.choice(list(Orientation)),
-                roof_style=np.random.choice(list(RoofStyle)),
-                roof_overhang=np.random.randint(1, 3),
-                roof_steepness=np.random.randint(1, 4),
+                orientation=rng.choice(list(Orientation)),
+                roof_style=rng.choice(list(RoofStyle)),
+                roof_overhang=rng.integers(1, 3),
+                roof_steepness=rng.integers(1, 4),
             )
 
+    def get_footprint(self, config: Any) -> Tuple[int, int, int, int]:
+        """Footprint covered by the walls of a building, known before generation
+
+        The generated building is never smaller than its walls, so a config
+        whose wall footprint overlaps a placed object can be rejected early.
+        """
+        x, _, z = config.position
+        size_x, size_z = config.length + 1, config.width + 1
+        # EAST and WEST buildings are the north-facing grid turned sideways
+        if config.orientation in (Orientation.EAST, Orientation.WEST):
+            size_x, size_z = size_z, size_x
+        return x, z, x + size_x, z + size_z
+
     def create_building(self, config: Any) -> Building:
         """Create appropriate building type based on config"""
-        if isinstance(config, TowerConfig):
-            return Tower(config)
-        elif isinstance(config, ChurchConfig):
-            return Church(config)
-        elif isinstance(config, ShopConfig):
-            return Shop(config)
-        else:
-            return Building(config)
+        return create_building(config)
+
+    def random_building_config(self, attempt: int, margin: int = 20) -> Any:
+        """Draw a random position and a config matching its district
+
+        Each attempt has its own random stream, so any candidate can be
+        regenerated on its own from the city seed and its attempt index.
+        """
+        rng = spawn_rng(self.seed, BUILDING_STREAM, attempt)
+        pos_x = rng.integers(1, self.world_size[0] - margin)
+        pos_z = rng.integers(1, self.world_size[2] - margin)
+        district_type = self.get_district_type(pos_x, pos_z)
+        return self.generate_building_config(district_type, (pos_x, 0, pos_z), rng)
+
+    def populate(
+        self,
+        num_buildings: int,
+        max_attempts: int = 1000,
+        workers: int = 1,
+        batch_size: int = 256,
+        exact: bool = True,
+    ) -> Tuple[int, int]:
+        """Place random buildings until enough are placed or attempts run out
+
+        With workers > 1 candidate configs are drawn in batches, their voxels
+        are generated in a process pool, and the buildings are committed to the
+        world one by one in draw order, so the resulting city is identical to
+        a serial run.
+
+        By default every candidate is generated and only the voxel check of
+        ``World.add_object`` decides, as before the footprint index existed.
+        Without ``exact``, candidates whose wall footprint overlaps the grid of
+        a placed building are skipped before their voxels are generated. That
+        is faster but stricter: it refuses some buildings that would fit next
+        to an overhang or into an empty corner of a neighbour's grid, so the
+        city gets fewer buildings.
+
+        Returns:
+            Number of placed buildings and number of attempts used
+        """
+        attempts = 0
+        added_buildings = 0
+        executor = ProcessPoolExecutor(workers) if workers > 1 else None
+        try:
+            while added_buildings < num_buildings and attempts < max_attempts:
+                batch = min(batch_size if executor else 1, max_attempts - attempts)
+                configs = [
+                    self.random_building_config(attempt)
+                    for attempt in range(attempts, attempts + batch)
+                ]
+
+                # Candidates already blocked by placed buildings are never built
+                pending = [
+                    config
+                    for config in configs
+                    if exact or self.world.is_footprint_free(self.get_footprint(config))
+                ]
+                if executor:
+                    chunksize = max(1, len(pending) // (workers * 4))
+                    built = executor.map(create_building, pending, chunksize=chunksize)
+                else:
+                    built = map(create_building, pending)
+                buildings = dict(zip(map(id, pending), built))
+
+                # Single-threaded placement stage in draw order
+                for config in configs:
+                    if added_buildings >= num_buildings:
+                        break
+                    attempts += 1
+                    building = buildings.get(id(config))
+                    if building is None:
+                        continue
+                    if not exact and not self.world.is_footprint_free(
+                        self.get_footprint(config)
+                    ):
+                        continue
+                    if self.world.add_object(f"building_{added_buildings}", building):
+                        added_buildings += 1
+                        if added_buildings % 10 == 0:
+                            print(f"Added {added_buildings} buildings...")
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+
+        return added_buildings, attempts
+
+    def get_palette_map(self, palette_indices: Dict[DistrictType, int]) -> np.ndarray:
+        """Palette index of every (x, z) column, from the district it lies in
+
+        Columns of districts without an entry, and outside every district, use
+        palette 0.
+        """
+        palette_map = np.zeros((self.world_size[0], self.world_size[2]), dtype=np.int16)
+        for district_type, bounds_list in self.districts.items():
+            index = palette_indices.get(district_type, 0)
+            for x_min, x_max, z_min, z_max in bounds_list:
+                palette_map[x_min:x_max, z_min:z_max] = index
+        return palette_map
 
     def get_buildings(self) -> List[Dict]:
         """Return all buildings with their configurations"""
         buildings = []
         for district_type, bounds_list in self.districts.items():
             for bounds in bounds_list:
+                rng = spawn_rng(self.seed, DISTRICT_STREAM, bounds[0], bounds[2])
                 building_config = self.generate_building_config(
-                    district_type, (bounds[0], 0, bounds[2])
+                    district_type, (bounds[0], 0, bounds[2]), rng
                 )
                 buildings.append(
                     {
@@ -159,45 +302,27 @@ class CityPlanner:
         return buildings
 
 
-def main():
+def main(workers: int = 1, exact: bool = True):
     # Create a world with larger size to accommodate districts
     world_size = (400, 30, 400)
-    city = CityPlanner(world_size)
+    city = CityPlanner(world_size, seed=42)  # For reproducible results
 
     # Create districts
     city.create_districts(district_size=80)
 
     # Generate buildings
-    num_buildings = 200
-    attempts = 0
-    max_attempts = 1000
-    added_buildings = 0
-
-    np.random.seed(42)  # For reproducible results
-
-    while added_buildings < num_buildings and attempts < max_attempts:
-        # Generate random position
-        pos_x = np.random.randint(1, world_size[0] - 20)
-        pos_z = np.random.randint(1, world_size[2] - 20)
-
-        # Get district type for position
-        district_type = city.get_district_type(pos_x, pos_z)
-
-        # Generate appropriate config and building
-        config = city.generate_building_config(district_type, (pos_x, 0, pos_z))
-        building = city.create_building(config)
-
-        # Try to add building
-        if city.world.add_object(f"building_{added_buildings}", building):
-            added_buildings += 1
-            if added_buildings % 10 == 0:
-                print(f"Added {added_buildings} buildings...")
-
-        attempts += 1
+    added_buildings, attempts = city.populate(
+        num_buildings=200, max_attempts=1000, workers=workers, exact=exact
+    )
 
     print(
         f"\nSuccessfully placed {added_buildings} buildings after {attempts} attempts"
     )
+    if workers == 1:
+        print(f"Building template cache: {BUILDING_CACHE.stats()}")
+    else:
+        # Every worker process fills its own cache, this one stays empty
+        print("Building template cache stats are kept per worker process")
 
     # Create renderer with enhanced color schemes
     renderer = Renderer(scale_factor=0.95)
@@ -226,8 +351,13 @@ def main():
         },
     }
 
-    # Set default color scheme
+    # Residential colors by default, every district type gets its own palette
     renderer.set_color_scheme(color_schemes["residential"])
+    palette_indices = {
+        DistrictType(name): renderer.add_color_scheme(scheme)
+        for name, scheme in color_schemes.items()
+    }
+    renderer.set_palette_map(city.get_palette_map(palette_indices))
 
     # Configure and render the world
     print("Rendering world...")
@@ -235,4 +365,18 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Generate and render a city")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used to generate building voxels",
+    )
+    parser.add_argument(
+        "--fast-placement",
+        action="store_true",
+        help="Skip candidates overlapping placed footprints before generating "
+        "them; faster, but places fewer buildings than the voxel check",
+    )
+    args = parser.parse_args()
+    main(workers=args.workers, exact=not args.fast_placement)
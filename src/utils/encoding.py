@@ -0,0 +1,95 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Longest run stored in one entry; longer runs are split across entries
+MAX_RUN_LENGTH = np.iinfo(np.uint16).max
+
+
+def pack_nibbles(values: np.ndarray) -> np.ndarray:
+    """Pack an array of values below 16 into bytes holding two values each"""
+    flat = np.ravel(values).astype(np.uint8)
+    if flat.size % 2:
+        flat = np.append(flat, np.uint8(0))
+    return (flat[0::2] << 4) | flat[1::2]
+
+
+def unpack_nibbles(packed: np.ndarray, size: int) -> np.ndarray:
+    """Inverse of ``pack_nibbles`` returning the first ``size`` values as int8"""
+    values = np.empty(packed.size * 2, dtype=np.int8)
+    values[0::2] = packed >> 4
+    values[1::2] = packed & 0x0F
+    return values[:size]
+
+
+def run_length_encode(voxels: np.ndarray):
+    """Run-length encode a grid in C order into (values, lengths) arrays
+
+    Runs longer than ``MAX_RUN_LENGTH`` are split so lengths fit in uint16.
+    """
+    flat = np.ravel(voxels)
+    if flat.size == 0:
+        return np.empty(0, dtype=flat.dtype), np.empty(0, dtype=np.uint16)
+
+    starts = np.concatenate(([0], np.flatnonzero(flat[1:] != flat[:-1]) + 1))
+    lengths = np.diff(np.append(starts, flat.size))
+    values = flat[starts]
+
+    pieces = -(-lengths // MAX_RUN_LENGTH)
+    if np.any(pieces > 1):
+        values = np.repeat(values, pieces)
+        split = np.full(pieces.sum(), MAX_RUN_LENGTH, dtype=np.int64)
+        split[np.cumsum(pieces) - 1] = lengths - (pieces - 1) * MAX_RUN_LENGTH
+        lengths = split
+    return values, lengths.astype(np.uint16)
+
+
+def run_length_decode(values: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Expand (values, lengths) back into a flat array"""
+    return np.repeat(values, lengths.astype(np.int64))
+
+
+def encode_batch(grids: Sequence[np.ndarray]) -> Dict[str, np.ndarray]:
+    """Encode several voxel grids of any shape into one set of flat arrays
+
+    Each grid is run-length encoded and the run values are 4-bit packed. The
+    result can be passed straight to ``np.savez`` and read back with
+    ``decode_sample``/``decode_batch``.
+    """
+    all_values: List[np.ndarray] = []
+    all_lengths: List[np.ndarray] = []
+    for grid in grids:
+        values, lengths = run_length_encode(grid)
+        all_values.append(values)
+        all_lengths.append(lengths)
+
+    run_counts = [len(lengths) for lengths in all_lengths]
+    values = np.concatenate(all_values) if all_values else np.empty(0, np.int8)
+    return {
+        "shapes": np.array([grid.shape for grid in grids], dtype=np.int32).reshape(
+            -1, 3
+        ),
+        "run_offsets": np.concatenate(([0], np.cumsum(run_counts))).astype(np.int64),
+        "values": pack_nibbles(values),
+        "lengths": (
+            np.concatenate(all_lengths) if all_lengths else np.empty(0, np.uint16)
+        ),
+    }
+
+
+def decode_sample(encoded: Dict[str, np.ndarray], index: int) -> np.ndarray:
+    """Decode a single grid from the output of ``encode_batch``"""
+    start, stop = encoded["run_offsets"][index : index + 2]
+    # Only unpack the bytes holding this grid's run values
+    byte_start = start // 2
+    packed = encoded["values"][byte_start : (stop + 1) // 2]
+    values = unpack_nibbles(packed, 2 * len(packed))[
+        start - 2 * byte_start : stop - 2 * byte_start
+    ]
+    flat = run_length_decode(values, encoded["lengths"][start:stop])
+    return flat.reshape(encoded["shapes"][index])
+
+
+def decode_batch(encoded: Dict[str, np.ndarray]) -> List[np.ndarray]:
+    """Decode every grid from the output of ``encode_batch``"""
+    return [decode_sample(encoded, i) for i in range(len(encoded["shapes"]))]
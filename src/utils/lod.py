@@ -0,0 +1,44 @@
+import numpy as np
+
+from src.renderer.materials import Material
+
+# Coarsest level of detail is 2 ** MAX_LOD_LEVEL voxels per block
+MAX_LOD_LEVEL = 3
+
+
+def downsample_majority(voxels: np.ndarray, factor: int) -> np.ndarray:
+    """Pool every factor^3 block of a grid into one voxel
+
+    A block is solid if any of its voxels is, and takes the most common
+    non-air value among its voxels (the lowest value on ties). Keeping every
+    occupied block solid stops one voxel thick walls from disappearing at
+    coarse levels. Any integer labels work, not only ``Material`` IDs, e.g.
+    the ``palette * len(Material) + material`` labels of the renderer. Grids
+    whose size is not a multiple of ``factor`` are padded with air.
+    """
+    if factor == 1:
+        return voxels
+    padded_shape = [-(-n // factor) * factor for n in voxels.shape]
+    padded = np.pad(voxels, [(0, p - n) for p, n in zip(padded_shape, voxels.shape)])
+    coarse_shape = [n // factor for n in padded_shape]
+    # (X, Y, Z, factor^3) view of the blocks
+    blocks = (
+        padded.reshape(
+            coarse_shape[0], factor, coarse_shape[1], factor, coarse_shape[2], factor
+        )
+        .transpose(0, 2, 4, 1, 3, 5)
+        .reshape(*coarse_shape, -1)
+    )
+
+    # Only count the labels that occur, in ascending order for the tie rule
+    labels = np.unique(blocks)
+    labels = labels[labels != Material.AIR]
+    if not labels.size:
+        return np.zeros(coarse_shape, dtype=voxels.dtype)
+    counts = np.stack(
+        [np.count_nonzero(blocks == label, axis=-1) for label in labels], axis=-1
+    )
+    pooled = labels[np.argmax(counts, axis=-1)]
+    # argmax picks the first label for blocks without any solid voxel
+    pooled[counts.max(axis=-1) == 0] = Material.AIR
+    return pooled.astype(voxels.dtype)
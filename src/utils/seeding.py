@@ -0,0 +1,13 @@
+import numpy as np
+
+
+def spawn_rng(root_seed: int, *key: int) -> np.random.Generator:
+    """Create the random generator for one independent stream under a root seed
+
+    The stream is identified by a tuple of stable integers (e.g. a style and a
+    building index). This is the same stream ``SeedSequence(root_seed).spawn``
+    would hand out, but any stream can be created directly without replaying
+    the ones before it, so single buildings can be regenerated in isolation and
+    generation can be sharded across processes.
+    """
+    return np.random.default_rng(np.random.SeedSequence(root_seed, spawn_key=key))
@@ -0,0 +1,27 @@
+"""Time tower generation against the original per-row loops
+
+Run with ``python -m tests.benchmark_tower``. Generation time should not grow
+with the padding needed by the roof overhang.
+"""
+
+import timeit
+
+import tests.conftest  # noqa: F401  (test roof when Roof is not available)
+from src.classes.BuildingConfig import TowerConfig
+from src.renderer.objects.Tower import Tower
+from tests.test_tower import LoopTower
+
+
+def main(number: int = 200):
+    for overhang in (1, 4, 8):
+        config = TowerConfig(width=8, length=8, height=12, roof_overhang=overhang)
+        for tower_class in (LoopTower, Tower):
+            seconds = timeit.timeit(lambda: tower_class(config), number=number)
+            print(
+                f"{tower_class.__name__:>9} roof_overhang={overhang}: "
+                f"{seconds / number * 1e6:.1f} us per tower"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+
+from src.dataset.VoxelAugmentation import VoxelAugmentation  # noqa: E402
+
+
+def reference(grid, turns, flip, shift, size):
+    """Pad x and z to ``size``, flip, ``np.rot90`` and shift one grid"""
+    padded = np.zeros((size, grid.shape[1], size), grid.dtype)
+    padded[: grid.shape[0], :, : grid.shape[2]] = grid
+    if flip:
+        padded = np.flip(padded, axis=0)
+    padded = np.rot90(padded, turns, axes=(0, 2))
+    shifted = np.zeros_like(padded)
+    sx, sz = shift
+    source = padded[max(0, -sx) : size - max(0, sx), :, max(0, -sz) : size - max(0, sz)]
+    shifted[
+        max(0, sx) : max(0, sx) + source.shape[0],
+        :,
+        max(0, sz) : max(0, sz) + source.shape[2],
+    ] = source
+    return shifted
+
+
+@pytest.mark.parametrize("size_x, size_z", [(16, 16), (16, 24), (24, 8)])
+def test_matches_numpy_transforms(size_x, size_z):
+    rng = np.random.default_rng(0)
+    voxels = rng.integers(0, 9, size=(32, size_x, 8, size_z)).astype(np.int8)
+    augmentation = VoxelAugmentation(max_shift=3, seed=1)
+    turns, flips, shifts = augmentation.sample(len(voxels))
+    out = augmentation.apply(voxels, turns, flips, shifts)
+    size = max(size_x, size_z)
+    assert out.shape == (32, size, 8, size)
+    for i, grid in enumerate(voxels):
+        expected = reference(grid, turns[i], flips[i], shifts[i], size)
+        np.testing.assert_array_equal(out[i], expected)
+
+
+def test_without_rotation_keeps_shape():
+    rng = np.random.default_rng(1)
+    voxels = rng.integers(0, 9, size=(8, 12, 4, 6)).astype(np.int8)
+    augmentation = VoxelAugmentation(rotate=False, seed=2)
+    turns, flips, shifts = augmentation.sample(len(voxels))
+    assert not turns.any() and not shifts.any()
+    out = augmentation.apply(voxels, turns, flips, shifts)
+    expected = np.where(flips[:, None, None, None], voxels[:, ::-1], voxels)
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_seeded_samples_repeat():
+    first = VoxelAugmentation(max_shift=2, seed=3).sample(64)
+    second = VoxelAugmentation(max_shift=2, seed=3).sample(64)
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
@@ -0,0 +1,73 @@
+import copy
+import pickle
+
+import numpy as np
+
+from src.classes.BuildingConfig import BuildingConfig, Orientation
+from src.renderer.objects.Building import Building
+from src.renderer.objects.BuildingCache import BuildingCache
+
+
+def test_rotated_views_match_rot90():
+    config = BuildingConfig(width=6, length=9, height=5)
+    north = Building(config).canonical_voxels
+    for orientation in Orientation:
+        building = Building(
+            BuildingConfig(width=6, length=9, height=5, orientation=orientation)
+        )
+        expected = np.rot90(north, k=orientation.value, axes=(0, 2))
+        np.testing.assert_array_equal(building.voxels, expected)
+        assert np.shares_memory(building.voxels, building.canonical_voxels)
+
+
+def test_pickle_sends_grid_once():
+    building = Building(
+        BuildingConfig(width=8, length=12, height=7, orientation=Orientation.EAST)
+    )
+    for orientation in Orientation:
+        building.get_rotated_voxels(orientation)
+
+    data = pickle.dumps(building)
+    grid = building.canonical_voxels.nbytes
+    assert grid < len(data) < 2 * grid
+
+    restored = pickle.loads(data)
+    np.testing.assert_array_equal(restored.voxels, building.voxels)
+    assert np.shares_memory(restored.voxels, restored.canonical_voxels)
+    assert restored.config.orientation == Orientation.EAST
+
+
+def test_cache_copies_share_the_template_grid():
+    cache = BuildingCache()
+    first = cache.get(BuildingConfig(width=5, length=7, height=4), Building)
+    second = cache.get(
+        BuildingConfig(width=5, length=7, height=4, orientation=Orientation.SOUTH),
+        Building,
+    )
+    assert cache.stats()["hits"] == 1
+    assert np.shares_memory(first.voxels, second.voxels)
+    assert not second.voxels.flags.writeable
+    np.testing.assert_array_equal(
+        second.voxels, np.rot90(first.voxels, k=2, axes=(0, 2))
+    )
+    assert copy.copy(second).voxels.shape == second.voxels.shape
+
+
+def test_cache_counts_all_bytes_the_template_holds():
+    cache = BuildingCache()
+    building = cache.get(BuildingConfig(width=5, length=5, height=4), Building)
+    grid = building.canonical_voxels
+    # The template grid owns its memory, so its nbytes is all it holds
+    assert grid.base is None
+    assert cache.stats()["bytes"] == grid.nbytes
+
+
+def test_grid_is_the_config_box():
+    config = BuildingConfig(
+        width=6, length=9, height=5, roof_height=3, roof_overhang=2, roof_steepness=3
+    )
+    building = Building(config)
+    # Walls plus two voxels of overhang and one spare voxel on every side, and
+    # room for three roof layers of up to three voxels each plus two eaves
+    assert building.canonical_voxels.shape == (9 + 1 + 6, 5 + 1 + 3 * 3 + 2, 6 + 1 + 6)
+    assert building.canonical_voxels.base is None
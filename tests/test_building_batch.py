@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from src.classes.BuildingConfig import BuildingConfig, TowerConfig
+from src.renderer.objects.Building import Building
+from src.renderer.objects.BuildingBatch import BuildingBatch
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_matches_building(seed, random_configs, assert_roof_rows):
+    configs = random_configs(seed, 40)
+    batch = BuildingBatch(configs)
+    for config, voxels in zip(configs, batch.iter_voxels()):
+        building = Building(config)
+        np.testing.assert_array_equal(voxels, building.voxels)
+        north = np.rot90(voxels, k=-config.orientation.value, axes=(0, 2))
+        assert_roof_rows(building, north)
+
+
+def test_voxels_do_not_keep_the_batch_alive(random_configs):
+    # A single north-facing building spans the whole tensor
+    configs = random_configs(0, 4)
+    configs.append(BuildingConfig(width=5, length=5, height=4))
+    for configs in (configs, configs[-1:]):
+        batch = BuildingBatch(configs)
+        for voxels in batch.iter_voxels():
+            assert voxels.base is None
+            assert voxels.flags.c_contiguous
+
+
+def test_rejects_subclass_configs():
+    with pytest.raises(TypeError):
+        BuildingBatch([TowerConfig(width=5, length=5, height=12)])
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from src.renderer.ChunkedVoxels import ChunkedVoxels
+from src.renderer.materials import Material
+from src.renderer.World import World
+
+SHAPE = (40, 20, 50)
+
+
+def random_box(rng):
+    lo = [int(rng.integers(0, n)) for n in SHAPE]
+    hi = [int(rng.integers(start, n + 1)) for start, n in zip(lo, SHAPE)]
+    return tuple(slice(start, stop) for start, stop in zip(lo, hi))
+
+
+def test_reads_and_writes_match_dense_array():
+    rng = np.random.default_rng(0)
+    dense = np.zeros(SHAPE, dtype=np.int8)
+    chunked = ChunkedVoxels(SHAPE, chunk_size=16)
+
+    for _ in range(50):
+        key = random_box(rng)
+        shape = dense[key].shape
+        value = rng.integers(0, len(Material), size=shape).astype(np.int8)
+        dense[key] = value
+        chunked[key] = value
+
+        key = random_box(rng)
+        np.testing.assert_array_equal(chunked[key], dense[key])
+    np.testing.assert_array_equal(np.asarray(chunked), dense)
+
+
+@pytest.mark.parametrize(
+    "key",
+    [3, -1, (3, 5), (slice(2, 9), 7, slice(None)), (1, 2, 3), (slice(None), -3)],
+)
+def test_integer_indices_drop_their_axis(key):
+    rng = np.random.default_rng(1)
+    dense = rng.integers(0, len(Material), size=SHAPE).astype(np.int8)
+    chunked = ChunkedVoxels(SHAPE, chunk_size=16)
+    chunked[:, :, :] = dense
+
+    assert np.shape(chunked[key]) == dense[key].shape
+    np.testing.assert_array_equal(chunked[key], dense[key])
+
+    value = rng.integers(0, len(Material), size=dense[key].shape).astype(np.int8)
+    dense[key] = value
+    chunked[key] = value
+    np.testing.assert_array_equal(np.asarray(chunked), dense)
+
+
+def test_chunks_cleared_to_air_are_freed():
+    chunked = ChunkedVoxels(SHAPE, chunk_size=16)
+    chunked[:] = Material.AIR
+    assert not chunked.chunks
+
+    chunked[2:5, 2:5, 2:5] = Material.STONE
+    chunked[20, 3, 20] = Material.ROOF
+    assert set(chunked.chunks) == {(0, 0, 0), (1, 0, 1)}
+
+    chunked[2:5, 2:5, 3] = Material.AIR
+    assert (0, 0, 0) in chunked.chunks
+    chunked[0:16, 0:16, 0:16] = Material.AIR
+    assert set(chunked.chunks) == {(1, 0, 1)}
+    assert chunked.nbytes == 16**3
+    assert chunked.any()
+    assert not chunked.any((slice(0, 16), slice(None), slice(0, 16)))
+
+
+def test_chunked_world_save_load_round_trip(tmp_path):
+    rng = np.random.default_rng(2)
+    world = World(SHAPE, chunk_size=16)
+    world.voxels[4:12, 0:6, 4:12] = Material.STONE
+    world.voxels[30:40, 0:20, 35:50] = rng.integers(0, len(Material), size=(10, 20, 15))
+
+    path = tmp_path / "world.npz"
+    world.save(path)
+    dense = World.load(path)
+    chunked = World.load(path, chunk_size=16)
+
+    assert isinstance(chunked.voxels, ChunkedVoxels)
+    assert dense.world_size == chunked.world_size == SHAPE
+    np.testing.assert_array_equal(dense.voxels, np.asarray(world.voxels))
+    np.testing.assert_array_equal(np.asarray(chunked.voxels), dense.voxels)
+    assert set(chunked.voxels.chunks) == set(world.voxels.chunks)
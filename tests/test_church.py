@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from src.classes.BuildingConfig import ChurchConfig
+from src.renderer.materials import Material
+from src.renderer.objects.Church import Church
+
+
+class LoopChurch(Church):
+    """Church with the original per-level loops and whole-grid stained glass"""
+
+    def create_stained_glass(self):
+        p = self.padding
+        self.voxels[self.voxels == Material.WINDOW] = Material.STAINED_GLASS
+        self.voxels[
+            p + self.config.length // 2 - 1 : p + self.config.length // 2 + 2,
+            2 : self.config.height - 1,
+            p : p + 1,
+        ] = Material.STAINED_GLASS
+
+    def create_bell_tower(self):
+        p = self.padding
+        tower_width = self.church_config.bell_tower_width
+        if self.church_config.bell_tower_position == "left":
+            tower_x = p - tower_width
+        else:
+            tower_x = p + self.config.length + 1
+        tower_z = p + (self.config.width // 3)
+        tower_depth = tower_width
+
+        self.voxels[
+            tower_x : tower_x + tower_width,
+            1 : self.church_config.bell_tower_height,
+            tower_z : tower_z + tower_depth,
+        ] = Material.STONE
+
+        for y in range(3, self.church_config.bell_tower_height - 3, 3):
+            self.voxels[tower_x + 1 : tower_x + tower_width - 1, y : y + 2, tower_z] = (
+                Material.STAINED_GLASS
+            )
+            self.voxels[
+                tower_x + 1 : tower_x + tower_width - 1,
+                y : y + 2,
+                tower_z + tower_depth - 1,
+            ] = Material.STAINED_GLASS
+            self.voxels[tower_x, y : y + 2, tower_z + 1 : tower_z + tower_depth - 1] = (
+                Material.STAINED_GLASS
+            )
+            self.voxels[
+                tower_x + tower_width - 1,
+                y : y + 2,
+                tower_z + 1 : tower_z + tower_depth - 1,
+            ] = Material.STAINED_GLASS
+
+        tower_top = self.church_config.bell_tower_height
+        for i in range(3):
+            if tower_width - i * 2 > 0:
+                self.voxels[
+                    tower_x + i : tower_x + tower_width - i,
+                    tower_top + i,
+                    tower_z + i : tower_z + tower_depth - i,
+                ] = Material.ROOF
+
+        cross_x = tower_x + (tower_width // 2)
+        cross_z = tower_z + (tower_depth // 2)
+        self.voxels[cross_x, tower_top + 2 : tower_top + 5, cross_z] = Material.STONE
+        self.voxels[cross_x - 1 : cross_x + 2, tower_top + 3, cross_z] = Material.STONE
+
+    def create_steeple(self):
+        p = self.padding
+        base_height = self.config.height + self.config.roof_height + 1
+        if self.church_config.bell_tower_position == "left":
+            center_x = self.config.length // 2 + p + 1
+        else:
+            center_x = self.config.length // 2 + p - 1
+        center_z = self.config.width // 2 + p
+
+        for y in range(base_height, base_height + 3):
+            self.voxels[center_x - 2 : center_x + 2, y, center_z - 2 : center_z + 2] = (
+                Material.STONE
+            )
+
+        spire_height = self.church_config.steeple_height - 3
+        for y in range(
+            base_height + 3, base_height + self.church_config.steeple_height
+        ):
+            progress = (y - (base_height + 3)) / spire_height
+            width = max(1, int(3 * (1 - progress)))
+            offset = width // 2
+            self.voxels[
+                center_x - offset : center_x + width - offset,
+                y,
+                center_z - offset : center_z + width - offset,
+            ] = Material.STONE
+
+        top_y = base_height + self.church_config.steeple_height
+        self.voxels[center_x, top_y : top_y + 3, center_z] = Material.STONE
+        self.voxels[center_x - 1 : center_x + 2, top_y + 1, center_z] = Material.STONE
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_church_matches_loops(
+    seed, random_configs, assert_matches_loops, assert_roof_rows
+):
+    configs = random_configs(
+        seed,
+        4,
+        ChurchConfig,
+        width=(8, 15),
+        length=(12, 20),
+        height=(6, 12),
+        window_height=(2, 5),
+        steeple_height=(6, 10),
+        bell_tower_height=(12, 22),
+        bell_tower_width=(3, 6),
+        bell_tower_position=["left", "right"],
+    )
+    for church in assert_matches_loops(Church, LoopChurch, configs):
+        assert not np.any(church.voxels == Material.WINDOW)
+        # Steeple and bell tower stand above the walls next to the roof
+        assert_roof_rows(church, parts=(Material.STONE, Material.STAINED_GLASS))
+        # The steeple's cross is the highest part on the roof line
+        top = church.config.height + church.config.roof_height + 1
+        top += church.church_config.steeple_height + 2
+        assert church.canonical_voxels[:, top, :].any()
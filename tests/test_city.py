@@ -0,0 +1,28 @@
+import numpy as np
+
+from src.renderer.utils.City import CityPlanner
+
+
+def populate(**kwargs):
+    city = CityPlanner((160, 30, 160), seed=7)
+    city.create_districts(district_size=80)
+    placed, attempts = city.populate(num_buildings=40, max_attempts=80, **kwargs)
+    return city, placed, attempts
+
+
+def test_default_placement_only_uses_the_voxel_check():
+    city, placed, _ = populate()
+    # Every candidate goes to World.add_object, in draw order
+    world = CityPlanner((160, 30, 160), seed=7).world
+    expected = 0
+    for attempt in range(80):
+        if expected == 40:
+            break
+        config = city.random_building_config(attempt)
+        if world.add_object(f"building_{expected}", city.create_building(config)):
+            expected += 1
+    assert placed == expected
+    np.testing.assert_array_equal(city.world.voxels, world.voxels)
+
+    _, fast_placed, _ = populate(exact=False)
+    assert fast_placed <= placed
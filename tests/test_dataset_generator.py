@@ -0,0 +1,65 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.dataset.BuildingDatasetGenerator import (
+    DEFAULT_BUCKET_SIZES,
+    BuildingDatasetGenerator,
+    BuildingStyle,
+)
+
+
+def test_batched_residential_matches_single_buildings(tmp_path):
+    generator = BuildingDatasetGenerator(tmp_path, seed=3)
+    samples = generator._generate_batch(BuildingStyle.RESIDENTIAL, range(50))
+    for index, (voxels, metadata) in enumerate(samples):
+        expected, expected_metadata = generator._generate_sample(
+            BuildingStyle.RESIDENTIAL, index
+        )
+        np.testing.assert_array_equal(voxels, expected)
+        assert metadata == expected_metadata
+
+
+def test_output_independent_of_batch_size(tmp_path):
+    generator = BuildingDatasetGenerator(tmp_path, seed=5)
+    styles = [BuildingStyle.RESIDENTIAL, BuildingStyle.SHOP]
+    small = list(generator.iter_buildings(10, styles=styles, chunksize=3))
+    large = list(generator.iter_buildings(10, styles=styles, chunksize=64))
+    assert len(small) == len(large) == 20
+    for (a, meta_a), (b, meta_b) in zip(small, large):
+        np.testing.assert_array_equal(a, b)
+        assert meta_a == meta_b
+
+
+def test_generate_dataset_buckets_by_default(tmp_path):
+    pytest.importorskip("torch")
+    from src.dataset.BuildingVoxelDataset import BuildingVoxelDataset
+
+    styles = [BuildingStyle.RESIDENTIAL, BuildingStyle.TOWER]
+    BuildingDatasetGenerator(tmp_path / "bucketed", seed=1).generate_dataset(
+        6, styles=styles
+    )
+    BuildingDatasetGenerator(tmp_path / "single", seed=1).generate_dataset(
+        6, styles=styles, bucket_sizes=None
+    )
+
+    bucketed = BuildingVoxelDataset(tmp_path / "bucketed")
+    single = BuildingVoxelDataset(tmp_path / "single")
+    assert bucketed.sharded and not single.sharded
+    assert len(bucketed) == len(single) == 12
+    for shard in bucketed.shards:
+        assert shard["bucket"] in DEFAULT_BUCKET_SIZES
+
+    # Same buildings, each padded to its own bucket instead of the largest one
+    expected = {
+        json.dumps(single.get_metadata(i), sort_keys=True): single[i]["voxels"]
+        for i in range(len(single))
+    }
+    for i in range(len(bucketed)):
+        voxels = bucketed[i]["voxels"]
+        padded = expected[json.dumps(bucketed.get_metadata(i), sort_keys=True)]
+        x, y, z = voxels.shape
+        np.testing.assert_array_equal(padded[:x, :y, :z], voxels)
+        assert not padded[x:].any() and not padded[:, y:].any()
+        assert not padded[:, :, z:].any()
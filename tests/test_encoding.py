@@ -0,0 +1,72 @@
+import numpy as np
+
+from src.renderer.materials import Material
+from src.utils.encoding import (
+    MAX_RUN_LENGTH,
+    decode_batch,
+    decode_sample,
+    encode_batch,
+    pack_nibbles,
+    run_length_encode,
+    unpack_nibbles,
+)
+
+
+def random_grids(seed, count=20):
+    rng = np.random.default_rng(seed)
+    grids = []
+    for _ in range(count):
+        shape = tuple(int(n) for n in rng.integers(0, 12, size=3))
+        # Mostly air with a few solid blocks, like real buildings
+        grid = np.where(
+            rng.random(shape) < 0.7, 0, rng.integers(0, len(Material), size=shape)
+        )
+        grids.append(grid.astype(np.int8))
+    return grids
+
+
+def test_pack_nibbles_round_trip():
+    values = np.arange(33) % 16
+    packed = pack_nibbles(values)
+    assert packed.size == 17
+    np.testing.assert_array_equal(unpack_nibbles(packed, values.size), values)
+
+
+def test_batch_round_trip():
+    for seed in range(5):
+        grids = random_grids(seed)
+        encoded = encode_batch(grids)
+        decoded = decode_batch(encoded)
+        assert len(decoded) == len(grids)
+        for grid, result in zip(grids, decoded):
+            assert result.dtype == np.int8
+            np.testing.assert_array_equal(result, grid)
+
+
+def test_decode_sample_at_odd_offsets():
+    grids = [np.full((1, 1, 3), 5, np.int8), np.arange(6, dtype=np.int8)]
+    grids[1] = grids[1].reshape(1, 2, 3)
+    encoded = encode_batch(grids)
+    # The second grid's runs start in the middle of a packed byte
+    assert encoded["run_offsets"][1] % 2 == 1
+    np.testing.assert_array_equal(decode_sample(encoded, 1), grids[1])
+    np.testing.assert_array_equal(decode_sample(encoded, 0), grids[0])
+
+
+def test_long_runs_are_split():
+    grid = np.zeros((MAX_RUN_LENGTH + 10, 1, 1), np.int8)
+    grid[-1, -1, -1] = Material.ROOF
+    values, lengths = run_length_encode(grid)
+    assert lengths.dtype == np.uint16
+    assert lengths.astype(np.int64).sum() == grid.size
+    assert len(values) == 3
+    np.testing.assert_array_equal(decode_batch(encode_batch([grid]))[0], grid)
+
+
+def test_savez_round_trip(tmp_path):
+    grids = random_grids(7)
+    np.savez(tmp_path / "voxels.npz", **encode_batch(grids))
+    with np.load(tmp_path / "voxels.npz") as encoded:
+        encoded = dict(encoded)
+    for i, grid in enumerate(grids):
+        np.testing.assert_array_equal(decode_sample(encoded, i), grid)
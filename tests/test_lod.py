@@ -0,0 +1,54 @@
+import numpy as np
+
+from src.renderer.materials import Material
+from src.utils.lod import downsample_majority
+
+
+def test_factor_one_is_identity():
+    voxels = np.arange(8, dtype=np.int8).reshape(2, 2, 2)
+    assert downsample_majority(voxels, 1) is voxels
+
+
+def test_single_solid_voxel_keeps_block_solid():
+    voxels = np.zeros((4, 4, 4), dtype=np.int8)
+    voxels[3, 0, 1] = Material.WINDOW
+    pooled = downsample_majority(voxels, 4)
+    assert pooled.shape == (1, 1, 1)
+    assert pooled[0, 0, 0] == Material.WINDOW
+
+
+def test_majority_ignores_air_and_breaks_ties_low():
+    block = np.zeros((2, 2, 2), dtype=np.int8)
+    block.flat[:3] = Material.ROOF
+    block.flat[3:5] = Material.STONE
+    assert downsample_majority(block, 2)[0, 0, 0] == Material.ROOF
+
+    block.flat[:] = Material.AIR
+    block.flat[:2] = Material.DOOR
+    block.flat[2:4] = Material.FLOOR
+    assert downsample_majority(block, 2)[0, 0, 0] == Material.FLOOR
+
+
+def test_pads_partial_blocks_with_air():
+    voxels = np.zeros((5, 3, 6), dtype=np.int8)
+    voxels[4, 2, 5] = Material.STONE
+    pooled = downsample_majority(voxels, 2)
+    assert pooled.shape == (3, 2, 3)
+    assert pooled.dtype == voxels.dtype
+    assert np.flatnonzero(pooled).tolist() == [
+        np.ravel_multi_index((2, 1, 2), (3, 2, 3))
+    ]
+
+
+def test_matches_per_block_reference():
+    rng = np.random.default_rng(0)
+    voxels = rng.choice(len(Material), size=(8, 8, 8), p=[0.6] + [0.05] * 8)
+    voxels = voxels.astype(np.int8)
+    pooled = downsample_majority(voxels, 4)
+    for index in np.ndindex(pooled.shape):
+        block = voxels[tuple(slice(i * 4, i * 4 + 4) for i in index)]
+        solid = block[block != Material.AIR]
+        expected = (
+            np.bincount(solid, minlength=len(Material)).argmax() if solid.size else 0
+        )
+        assert pooled[index] == expected
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from src.renderer.materials import Material
+from src.renderer.Mesher import Mesher
+
+
+def random_grid(seed, shape=(9, 7, 8), fill=0.5):
+    rng = np.random.default_rng(seed)
+    materials = rng.integers(1, 4, size=shape)
+    return np.where(rng.random(shape) < fill, materials, Material.AIR).astype(np.int8)
+
+
+def exposed_faces(voxels):
+    """Set of (x, y, z, axis, direction) for every voxel face next to air"""
+    solid = np.pad(voxels != Material.AIR, 1)
+    faces = set()
+    for axis in range(3):
+        for direction in (1, -1):
+            neighbour = np.roll(solid, -direction, axis=axis)
+            visible = (solid & ~neighbour)[1:-1, 1:-1, 1:-1]
+            faces.update((x, y, z, axis, direction) for x, y, z in np.argwhere(visible))
+    return faces
+
+
+def quad_normals(vertices):
+    # Every quad is four consecutive vertices, split along its 0-2 diagonal
+    quads = vertices.reshape(-1, 4, 3)
+    return np.cross(quads[:, 1] - quads[:, 0], quads[:, 2] - quads[:, 0])
+
+
+def covered_faces(vertices, labels):
+    """Yield (voxel face, label) for every voxel face covered by a quad"""
+    quads = vertices.reshape(-1, 4, 3)
+    for corners, normal, label in zip(quads, quad_normals(vertices), labels[::4]):
+        axis = int(np.argmax(np.abs(normal)))
+        direction = int(np.sign(normal[axis]))
+        lo = np.rint(corners.min(axis=0) + 0.5).astype(int)
+        hi = np.rint(corners.max(axis=0) + 0.5).astype(int)
+        lo[axis] = hi[axis] = int(np.rint(corners[0, axis] - 0.5 * direction))
+        hi[axis] += 1
+        for x in range(lo[0], hi[0]):
+            for y in range(lo[1], hi[1]):
+                for z in range(lo[2], hi[2]):
+                    yield (x, y, z, axis, direction), label
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_quad_area_equals_exposed_faces(seed):
+    voxels = random_grid(seed)
+    vertices, _, _ = Mesher().build_labels(voxels)
+    area = np.linalg.norm(quad_normals(vertices), axis=1).sum()
+    assert area == pytest.approx(len(exposed_faces(voxels)))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_quads_cover_each_face_once_with_its_material(seed):
+    voxels = random_grid(seed, fill=0.7)
+    vertices, _, labels = Mesher().build_labels(voxels)
+
+    covered = []
+    for (x, y, z, axis, direction), label in covered_faces(vertices, labels):
+        assert voxels[x, y, z] == label
+        covered.append((x, y, z, axis, direction))
+    assert len(covered) == len(set(covered))
+    assert set(covered) == exposed_faces(voxels)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_faces_are_wound_outwards(seed):
+    voxels = random_grid(seed)
+    vertices, triangles, _ = Mesher().build_labels(voxels)
+    solid = np.pad(voxels != Material.AIR, 1)
+
+    quads = vertices.reshape(-1, 4, 3)
+    centers = (quads[:, 0] + quads[:, 2]) / 2
+    normals = quad_normals(vertices)
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    inside = np.rint(centers - 0.5 * normals).astype(int) + 1
+    outside = np.rint(centers + 0.5 * normals).astype(int) + 1
+    assert solid[tuple(inside.T)].all()
+    assert not solid[tuple(outside.T)].any()
+
+    # Both triangles of a quad face the same way
+    second = np.cross(
+        vertices[triangles[1::2, 1]] - vertices[triangles[1::2, 0]],
+        vertices[triangles[1::2, 2]] - vertices[triangles[1::2, 0]],
+    )
+    assert (np.einsum("ij,ij->i", second, normals) > 0).all()
+
+
+def test_scale_factor_insets_merged_quads():
+    voxels = np.zeros((3, 1, 1), dtype=np.int8)
+    voxels[:] = Material.STONE
+    vertices, triangles, colors = Mesher(scale_factor=0.8).build(
+        voxels, np.eye(len(Material), 3), offset=(10, 20, 30)
+    )
+
+    # The bar is merged into one quad per side, inset by 0.1 around the bar
+    # instead of around every voxel
+    assert len(triangles) == 6 * 2
+    relative = vertices - np.array([10, 20, 30])
+    np.testing.assert_allclose(relative.min(axis=0), [-0.4, -0.4, -0.4])
+    np.testing.assert_allclose(relative.max(axis=0), [2.4, 0.4, 0.4])
+    area = np.linalg.norm(quad_normals(vertices), axis=1).sum()
+    assert area == pytest.approx(4 * 2.8 * 0.8 + 2 * 0.8 * 0.8)
+    stone = np.eye(len(Material), 3)[Material.STONE]
+    np.testing.assert_array_equal(colors, np.broadcast_to(stone, colors.shape))
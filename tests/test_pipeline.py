@@ -0,0 +1,110 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("diffusers")
+
+from diffusers import DDPMScheduler, DPMSolverMultistepScheduler  # noqa: E402
+
+from src.model.VoxelDiffusion import UNet3DModel  # noqa: E402
+from src.model.VoxelDiffusionPipeline import (  # noqa: E402
+    VoxelDiffusionPipeline,
+    get_fast_scheduler,
+)
+
+NUM_MATERIALS = 9
+GRID = (8, 8, 16)
+
+
+def make_pipeline(encoding="onehot", seed=0):
+    torch.manual_seed(seed)
+    channels = 4 if encoding == "bits" else NUM_MATERIALS
+    unet = UNet3DModel(
+        channels, channels, block_out_channels=(8, 16, 32, 64), attention_window=4
+    ).eval()
+    scheduler = get_fast_scheduler(DDPMScheduler(num_train_timesteps=100))
+    return VoxelDiffusionPipeline(unet, scheduler, NUM_MATERIALS, GRID, encoding)
+
+
+def sample(pipeline, seed=0, **kwargs):
+    kwargs.setdefault("num_inference_steps", 3)
+    generator = torch.Generator().manual_seed(seed)
+    return pipeline(generator=generator, return_dict=False, **kwargs)
+
+
+def test_micro_batches_cover_the_whole_batch():
+    pipeline = make_pipeline()
+    sizes = []
+    pipeline.unet.register_forward_hook(
+        lambda module, args, output: sizes.append(args[0].shape[0])
+    )
+    voxels = sample(pipeline, batch_size=5, micro_batch_size=2, output_type="indices")
+
+    assert sizes == [2] * 3 + [2] * 3 + [1] * 3
+    assert voxels.shape == (5, *GRID)
+    assert voxels.dtype == torch.uint8
+    assert int(voxels.max()) < NUM_MATERIALS
+
+
+def test_output_types_agree():
+    pipeline = make_pipeline()
+    onehot = sample(pipeline, batch_size=3, micro_batch_size=2)
+    channels = sample(
+        pipeline, batch_size=3, micro_batch_size=2, output_type="channels"
+    )
+    indices = sample(pipeline, batch_size=3, micro_batch_size=2, output_type="indices")
+
+    assert onehot.shape == (3, NUM_MATERIALS, *GRID)
+    assert onehot.dtype == torch.float32
+    # With the one-hot encoding the model channels are one per material
+    torch.testing.assert_close(onehot, channels)
+    torch.testing.assert_close(indices, onehot.argmax(dim=1).to(torch.uint8))
+    with pytest.raises(ValueError):
+        sample(pipeline, output_type="mesh")
+
+
+def test_bit_encoding_samples_material_ids():
+    pipeline = make_pipeline("bits")
+    bits = sample(pipeline, batch_size=2, output_type="channels")
+    onehot = sample(pipeline, batch_size=2)
+    indices = sample(pipeline, batch_size=2, output_type="indices")
+
+    assert bits.shape == (2, 4, *GRID)
+    assert int(indices.max()) < NUM_MATERIALS
+    expected = pipeline.encoding.decode(bits * 2.0 - 1.0).to(torch.uint8)
+    torch.testing.assert_close(indices, expected)
+
+    # "onehot" is one channel per material even though the model sees bits
+    assert onehot.shape == (2, NUM_MATERIALS, *GRID)
+    assert torch.all(onehot.sum(dim=1) == 1)
+    torch.testing.assert_close(onehot.argmax(dim=1).to(torch.uint8), indices)
+
+
+def test_same_seed_gives_same_samples():
+    pipeline = make_pipeline()
+    first = sample(pipeline, seed=1, batch_size=3, output_type="indices")
+    second = sample(pipeline, seed=1, batch_size=3, output_type="indices")
+    other = sample(pipeline, seed=2, batch_size=3, output_type="indices")
+
+    torch.testing.assert_close(first, second)
+    assert not torch.equal(first, other)
+
+
+def test_save_and_load_pretrained_round_trip(tmp_path):
+    pipeline = make_pipeline("bits")
+    pipeline.save_pretrained(tmp_path)
+
+    # A differently initialized model gets the saved weights back
+    unet = make_pipeline("bits", seed=1).unet
+    loaded = VoxelDiffusionPipeline.load_pretrained(
+        tmp_path, unet, scheduler_class=DPMSolverMultistepScheduler
+    )
+
+    assert isinstance(loaded.scheduler, DPMSolverMultistepScheduler)
+    assert loaded.scheduler.config.num_train_timesteps == 100
+    assert loaded.voxel_channels == NUM_MATERIALS
+    assert tuple(loaded.voxel_size) == GRID
+    assert loaded.encoding.name == "bits"
+    torch.testing.assert_close(
+        sample(loaded, batch_size=2, output_type="indices"),
+        sample(pipeline, batch_size=2, output_type="indices"),
+    )
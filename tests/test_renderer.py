@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from src.classes.BuildingConfig import BuildingConfig
+from src.renderer.materials import Material
+from src.renderer.objects.Building import Building
+from src.renderer.Renderer import Renderer
+from src.renderer.World import World
+
+
+def make_world():
+    world = World((32, 16, 32))
+    world.voxels[4:12, 0:6, 4:12] = Material.STONE
+    world.voxels[4:12, 6:8, 4:12] = Material.ROOF
+    return world
+
+
+def test_palette_mapped_chunk_survives_pooling():
+    renderer = Renderer(chunk_size=32)
+    palette = renderer.add_color_scheme({"wall": [0.1, 0.2, 0.3]})
+    renderer.set_palette_map(np.full((32, 32), palette, dtype=np.int16))
+    world = make_world()
+
+    for level in range(4):
+        _, triangles, labels = renderer._mesh_chunk(world, (0, 0, 0), level)
+        assert len(triangles) > 0
+        materials = set(np.unique(labels % len(Material)).tolist())
+        assert materials <= {Material.STONE, Material.ROOF}
+        assert set(np.unique(labels // len(Material)).tolist()) == {palette}
+
+
+def test_lod_mesh_uses_district_colors():
+    renderer = Renderer(chunk_size=32, lod_distance=16.0)
+    color = [0.1, 0.2, 0.3]
+    palette = renderer.add_color_scheme({"wall": color, "roof": color})
+    renderer.set_palette_map(np.full((32, 32), palette, dtype=np.int16))
+
+    # Far enough away for the coarsest level of detail
+    _, triangles, colors = renderer.update_world_mesh(
+        make_world(), camera_position=(400.0, 0.0, 400.0)
+    )
+    assert len(triangles) > 0
+    np.testing.assert_allclose(colors, np.broadcast_to(color, colors.shape))
+
+
+def test_palette_labels_select_palette_rows():
+    renderer = Renderer()
+    first = renderer.add_color_scheme({"roof": [1.0, 0.0, 0.0]})
+    second = renderer.add_color_scheme({"roof": [0.0, 1.0, 0.0]})
+    palette = renderer._get_palette()
+    assert palette.shape == (3 * len(Material), 3)
+    for index, color in ((first, [1.0, 0.0, 0.0]), (second, [0.0, 1.0, 0.0])):
+        label = index * len(Material) + Material.ROOF
+        np.testing.assert_array_equal(palette[label], color)
+        assert renderer._get_color_for_material(Material.ROOF, index) == color
+    np.testing.assert_array_equal(palette[: len(Material)], renderer.palettes[0])
+
+
+def test_color_scheme_ignores_unknown_keys():
+    renderer = Renderer()
+    renderer.set_color_scheme({"wall": [0.5, 0.5, 0.5], "trim": [1.0, 1.0, 1.0]})
+    index = renderer.add_color_scheme({"window": [0.0, 0.0, 1.0], "glow": 2.0})
+    assert renderer._get_color_for_material(Material.STONE) == [0.5, 0.5, 0.5]
+    assert renderer._get_color_for_material(Material.WINDOW, index) == [0.0, 0.0, 1.0]
+    np.testing.assert_array_equal(
+        np.delete(renderer.palettes[index], Material.WINDOW, axis=0),
+        np.delete(renderer.palettes[0], Material.WINDOW, axis=0),
+    )
+
+
+def test_add_object_rejects_voxels_written_directly():
+    world = make_world()
+    before = world.voxels.copy()
+    building = Building(BuildingConfig(width=5, length=5, height=4, position=(2, 0, 2)))
+    assert not world.add_object("house", building)
+    np.testing.assert_array_equal(world.voxels, before)
+
+    building.config.position = (14, 0, 14)
+    assert world.add_object("house", building)
+
+
+@pytest.mark.parametrize("chunk_size", [None, 16])
+def test_incremental_world_mesh_matches_full_rebuild(chunk_size):
+    world = World((96, 24, 96), chunk_size=chunk_size)
+    # Walls on chunk borders, whose faces and pooled voxels depend on the
+    # buildings placed next to them in the neighbouring chunks
+    world.voxels[16, 0:8, :] = Material.STONE
+    world.voxels[:, 0:8, 48] = Material.STONE
+    renderer = Renderer(chunk_size=16, lod_distance=24.0)
+    renderer.update_world_mesh(world)
+
+    def check(camera_position):
+        incremental = renderer.update_world_mesh(world, camera_position)
+        full = Renderer(chunk_size=16, lod_distance=24.0).update_world_mesh(
+            world, camera_position
+        )
+        for a, b in zip(incremental, full):
+            np.testing.assert_array_equal(a, b)
+
+    steps = [
+        ("add", "a", (2, 0, 2)),
+        ("add", "b", (17, 0, 27)),
+        ("add", "c", (41, 0, 36)),
+        ("remove", "b", None),
+        ("add", "d", (60, 0, 49)),
+        ("remove", "a", None),
+        ("add", "b", (2, 0, 30)),
+    ]
+    for i, (action, name, position) in enumerate(steps):
+        if action == "add":
+            config = BuildingConfig(width=7, length=9, height=5, position=position)
+            assert world.add_object(name, Building(config))
+        else:
+            world.remove_object(name)
+        # Alternate between full resolution and LOD meshes cached earlier
+        check(None if i % 2 else (0.0, 12.0, 0.0))
+        check((250.0, 12.0, 250.0))
@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+
+from src.dataset.BuildingVoxelDataset import BuildingVoxelDataset  # noqa: E402
+from src.dataset.ShardWriter import ShardWriter  # noqa: E402
+from src.dataset.VoxelTensorCache import VoxelTensorCache  # noqa: E402
+
+
+def write_dataset(path, count=12, seed=0):
+    rng = np.random.default_rng(seed)
+    with ShardWriter(path, shard_size=5) as writer:
+        for i in range(count):
+            shape = tuple(int(n) for n in rng.integers(3, 10, size=3))
+            writer.add(rng.integers(0, 9, size=shape).astype(np.int8), {"i": i})
+
+
+def test_concurrent_builds_leave_one_cache(tmp_path):
+    write_dataset(tmp_path)
+    with ThreadPoolExecutor(4) as executor:
+        caches = list(
+            executor.map(
+                lambda _: VoxelTensorCache(
+                    BuildingVoxelDataset(tmp_path), (12, 12, 12)
+                ),
+                range(4),
+            )
+        )
+    files = sorted(path.name for path in (tmp_path / "tensor_cache").iterdir())
+    assert files == [caches[0].cache_path.name]
+    voxels = BuildingVoxelDataset(tmp_path)[3]["voxels"]
+    cached = caches[1][3]["voxels"].numpy()
+    assert (cached != 0).sum() == (voxels != 0).sum()
+
+
+def test_half_storage_is_one_hot(tmp_path):
+    write_dataset(tmp_path)
+    dataset = BuildingVoxelDataset(tmp_path)
+    indices = VoxelTensorCache(dataset, (12, 12, 12))
+    half = VoxelTensorCache(dataset, (12, 12, 12), storage="half")
+    one_hot = half[5]["voxels"].numpy()
+    assert one_hot.dtype == np.float16
+    np.testing.assert_array_equal(one_hot.argmax(axis=0), indices[5]["voxels"].numpy())
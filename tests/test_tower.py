@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from src.classes.BuildingConfig import TowerConfig
+from src.renderer.materials import Material
+from src.renderer.objects.Tower import Tower
+
+
+class LoopTower(Tower):
+    """Tower with the original per-row loops and whole-grid roof removal"""
+
+    def remove_roof(self):
+        self.voxels[self.voxels == Material.ROOF] = Material.AIR
+
+    def create_battlements(self):
+        p = self.padding
+        height = self.config.height
+        for i in range(p, self.voxels.shape[0] - p, 2):
+            self.voxels[i : i + 1, height : height + 2, p:-p] = Material.STONE
+            self.voxels[p:-p, height : height + 2, i : i + 1] = Material.STONE
+
+    def create_floor_markers(self):
+        p = self.padding
+        for floor in range(1, self.tower_config.num_floors + 1):
+            height = (self.config.height // self.tower_config.num_floors) * floor
+            self.voxels[p:-p, height : height + 1, p:-p] = Material.FLOOR
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_tower_matches_loops(
+    seed, random_configs, assert_matches_loops, assert_roof_rows
+):
+    configs = random_configs(
+        seed,
+        4,
+        TowerConfig,
+        width=(5, 9),
+        length=(5, 9),
+        height=(12, 20),
+        num_floors=(3, 5),
+        has_battlements=[True, False],
+        roof_overhang=(1, 4),
+    )
+    for tower in assert_matches_loops(Tower, LoopTower, configs):
+        config = tower.config
+        if not config.has_battlements:
+            assert_roof_rows(tower)
+            continue
+        # The roof is gone, whatever its shape, and only the battlements rise
+        # above the walls
+        voxels = tower.canonical_voxels
+        assert not np.any(voxels == Material.ROOF)
+        assert not voxels[:, config.height + 2 :, :].any()
+        assert voxels[:, config.height + 1, :].any()